@@ -0,0 +1,307 @@
+import getopt
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from multiprocessing import Pool
+
+from CommonGraphGenerator import CommonGraphGenerator
+from GenerationMetrics import GenerationMetrics
+from GraphGenerator import GraphGenerator
+from GraphParameters import GraphParameters
+from GraphUtils import GraphUtils
+
+###################################################################
+# Benchmarks of the generation stages                             #
+###################################################################
+# Every stage is run for each (number of nodes, edge probability) of the grid, in a fresh process, and its
+# wall-clock time (best of the repeats) and peak memory (increase of the peak resident memory over the memory in
+# use once its input is prepared, measured in a process forked after the preparation) are recorded. The results are compared against a stored baseline: a stage that is
+# slower (or uses more memory) than the baseline by more than the threshold is reported as a regression and
+# the script exits with status 1.
+#
+# The 'cli_import' stage measures the time (and memory) taken to import the command line interface in a new
+# interpreter; it also fails when that exceeds the import time budget, or loads matplotlib (which is only needed
+# to display graphs, see GraphVisualiser).
+#
+# python BenchmarkGraphGenerators.py --save_baseline       (record the baseline on this machine)
+# python BenchmarkGraphGenerators.py                       (compare against it)
+
+STAGES = ['cli_import', 'common_graph', 'compact_common_graph', 'node_attributes', 'graph_attributes', 'generate_graph',
+          'add_random_edge', 'save_graph', 'post_process_graphml', 'save_post_processed_graph']
+NODE_COUNTS = [100, 1000, 5000]
+EDGE_PROBABILITIES = [0.01, 0.05]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+# differences below these are measurement noise, not regressions
+MIN_SECONDS = 0.01
+MIN_MEMORY_MB = 2.0
+CLI_MODULE = 'generate_graphs'
+IMPORT_TIME_BUDGET = 0.5  # seconds
+IMPORT_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, %r)
+from GenerationMetrics import GenerationMetrics
+memory_before = GenerationMetrics.peak_memory_mb()
+start = time.time()
+import %s
+seconds = time.time() - start
+print(json.dumps({'seconds': seconds, 'peak_memory_mb': GenerationMetrics.peak_memory_mb() - memory_before,
+                  'matplotlib_loaded': 'matplotlib' in sys.modules}))
+"""
+
+
+def prepare_stage(stage, no_of_nodes, probability, work_folder):
+    """
+    Build the input of a stage (not measured).
+    :return: function running the stage
+    """
+    rng = random.Random(no_of_nodes)
+    if stage == 'common_graph':
+        return CommonGraphGenerator(no_of_nodes, no_of_nodes, probability, direct_sampling=True,
+                                    rng=rng).generate_graph
+    if stage == 'compact_common_graph':
+        return CommonGraphGenerator(no_of_nodes, no_of_nodes, probability, rng=rng).generate_compact_graph
+    if stage == 'graph_attributes':
+        return lambda: GraphParameters.get_graph_attributes(no_of_nodes, GraphParameters.numpy_rng(rng))
+
+    common_graph_generator = CommonGraphGenerator(no_of_nodes, no_of_nodes, probability, direct_sampling=True,
+                                                  rng=rng)
+    common_graph = common_graph_generator.generate_graph()
+    if stage == 'node_attributes':
+        return common_graph_generator.add_attributes_to_nodes
+    graph_generator = GraphGenerator(common_graph, max_no_of_total_nodes=2 * no_of_nodes, rng=rng)
+    if stage == 'generate_graph':
+        return graph_generator.generate_graph
+    if stage == 'add_random_edge':
+        graph_generator.generate_variant()
+        return lambda: [graph_generator.add_random_edge() for i in range(10)]
+
+    graph_generator.generate_graph()
+    file_path = os.path.join(work_folder, "graph.graphml")
+    if stage == 'save_graph':
+        return lambda: graph_generator.save_graph(file_path)
+    if stage == 'save_post_processed_graph':
+        return lambda: graph_generator.save_post_processed_graph(file_path + ".xml")
+    if stage == 'post_process_graphml':
+        graph_generator.save_graph(file_path)
+
+        def post_process():
+            utils = GraphUtils()
+            utils.post_process_graphml(file_path)
+            utils.save_file(file_path + ".xml")
+        return post_process
+    raise ValueError("Unknown stage: %s" % stage)
+
+
+def measure_in_child(run):
+    """
+    Run a function in a child process forked once its input is prepared. The peak resident memory of the child
+    starts at the memory in use at the fork (not at the peak of the parent, e.g. while preparing the input), so
+    its increase is the memory used by the function.
+    :return: (seconds, peak memory in MB) of the function
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            os.close(read_end)
+            memory_before = GenerationMetrics.peak_memory_mb()
+            start = time.time()
+            run()
+            seconds = time.time() - start
+            os.write(write_end, json.dumps([seconds, GenerationMetrics.peak_memory_mb() - memory_before]))
+            status = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+    os.close(write_end)
+    with os.fdopen(read_end) as stream:
+        output = stream.read()
+    os.waitpid(pid, 0)
+    if not output:
+        raise RuntimeError("The benchmarked stage failed (see the traceback above).")
+    return tuple(json.loads(output))
+
+
+def run_stage(case):
+    """
+    Run a stage (in a fresh process, see run_benchmarks).
+    :param case: (stage, number of nodes, edge probability, number of repeats) tuple
+    :return: dictionary with the best time in seconds and the peak memory in MB
+    """
+    stage, no_of_nodes, probability, repeats = case
+    work_folder = tempfile.mkdtemp()
+    try:
+        seconds = []
+        memory = 0.0
+        for i in range(repeats):
+            stage_seconds, stage_memory = measure_in_child(prepare_stage(stage, no_of_nodes, probability,
+                                                                         work_folder))
+            seconds.append(stage_seconds)
+            memory = max(memory, stage_memory)
+        return {'seconds': min(seconds), 'peak_memory_mb': memory}
+    finally:
+        shutil.rmtree(work_folder, ignore_errors=True)
+
+
+def measure_import(module=CLI_MODULE, repeats=3):
+    """
+    Import a module in a new interpreter (so nothing is imported yet).
+    :return: dictionary with the best import time in seconds, the peak memory in MB and whether matplotlib was
+             loaded
+    """
+    script = IMPORT_SCRIPT % (os.path.dirname(os.path.abspath(__file__)), module)
+    results = [json.loads(subprocess.check_output([sys.executable, "-c", script]).strip().splitlines()[-1])
+               for i in range(repeats)]
+    return {'seconds': min(result['seconds'] for result in results),
+            'peak_memory_mb': min(result['peak_memory_mb'] for result in results),
+            'matplotlib_loaded': any(result['matplotlib_loaded'] for result in results)}
+
+
+def check_import_budget(results, budget):
+    """
+    :param results: benchmark results (see run_benchmarks)
+    :param budget: import time budget in seconds
+    :return: list of messages for the imports over the budget (or loading matplotlib)
+    """
+    messages = []
+    for name in sorted(results):
+        if 'matplotlib_loaded' not in results[name]:
+            continue
+        if results[name]['seconds'] > budget:
+            messages.append("%s: %.4f s, over the import time budget of %.4f s" % (
+                name, results[name]['seconds'], budget))
+        if results[name]['matplotlib_loaded']:
+            messages.append("%s: matplotlib is imported" % name)
+    return messages
+
+
+def case_name(stage, no_of_nodes, probability):
+    return "%s[n=%d,p=%s]" % (stage, no_of_nodes, probability)
+
+
+def run_benchmarks(stages, node_counts, probabilities, repeats=3):
+    """
+    :return: dictionary of case name -> result (see run_stage)
+    """
+    results = {}
+    for stage in stages:
+        if stage == 'cli_import':  # does not depend on the graph size
+            name = "cli_import[%s]" % CLI_MODULE
+            results[name] = measure_import(CLI_MODULE, repeats)
+            print "%-55s %10.4f s %10.1f MB" % (name, results[name]['seconds'], results[name]['peak_memory_mb'])
+            continue
+        for no_of_nodes in node_counts:
+            for probability in probabilities:
+                pool = Pool(1)  # fresh process, so the peak memory of a stage is not hidden by earlier stages
+                try:
+                    result = pool.apply(run_stage, ((stage, no_of_nodes, probability, repeats),))
+                finally:
+                    pool.terminate()
+                    pool.join()
+                name = case_name(stage, no_of_nodes, probability)
+                results[name] = result
+                print "%-55s %10.4f s %10.1f MB" % (name, result['seconds'], result['peak_memory_mb'])
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    :param results: benchmark results (see run_benchmarks)
+    :param baseline: stored results to compare with
+    :param threshold: allowed relative increase (e.g. 0.2 for 20%)
+    :return: list of regression messages
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        for (measure, noise) in (('seconds', MIN_SECONDS), ('peak_memory_mb', MIN_MEMORY_MB)):
+            value = results[name][measure]
+            reference = baseline[name][measure]
+            if value > reference * (1 + threshold) and value - reference > noise:
+                regressions.append("%s: %s %.4f, baseline %.4f (+%.0f%%)" % (
+                    name, measure, value, reference, 100.0 * (value - reference) / max(reference, 1e-9)))
+    return regressions
+
+
+def main(argv):
+    usage = "BenchmarkGraphGenerators.py -b <baseline file> -t <regression threshold, e.g. 0.2> -r <repeats> " \
+            "[--stages <stages>] [--nodes <node counts>] [--probabilities <edge probabilities>] " \
+            "[--import_budget <seconds>] [--save_baseline]"
+    baseline_file = DEFAULT_BASELINE
+    threshold = 0.2
+    repeats = 3
+    stages = STAGES
+    node_counts = NODE_COUNTS
+    probabilities = EDGE_PROBABILITIES
+    save_baseline = False
+    import_budget = IMPORT_TIME_BUDGET
+    try:
+        opts, args = getopt.getopt(argv, "hb:t:r:", ["baseline=", "threshold=", "repeats=", "stages=", "nodes=",
+                                                     "probabilities=", "import_budget=", "save_baseline"])
+        for opt, arg in opts:
+            if opt == '-h':
+                print usage
+                sys.exit()
+            elif opt in ("-b", "--baseline"):
+                baseline_file = arg
+            elif opt in ("-t", "--threshold"):
+                threshold = float(arg)
+            elif opt in ("-r", "--repeats"):
+                repeats = int(arg)
+            elif opt == "--stages":
+                stages = arg.split(",")
+            elif opt == "--nodes":
+                node_counts = [int(value) for value in arg.split(",")]
+            elif opt == "--probabilities":
+                probabilities = [float(value) for value in arg.split(",")]
+            elif opt == "--import_budget":
+                import_budget = float(arg)
+            elif opt == "--save_baseline":
+                save_baseline = True
+    except (getopt.GetoptError, ValueError):
+        print usage
+        sys.exit(2)
+
+    results = run_benchmarks(stages, node_counts, probabilities, repeats)
+    over_budget = check_import_budget(results, import_budget)
+    for message in over_budget:
+        print message
+    if save_baseline:
+        baseline = {}
+        if os.path.isfile(baseline_file):  # keep the cases that were not run this time
+            with open(baseline_file) as stream:
+                baseline = json.load(stream)
+        baseline.update(results)
+        with open(baseline_file, "w") as stream:
+            json.dump(baseline, stream, indent=2, sort_keys=True)
+        print "Baseline saved to %s" % baseline_file
+        if over_budget:
+            sys.exit(1)
+    elif os.path.isfile(baseline_file):
+        with open(baseline_file) as stream:
+            regressions = find_regressions(results, json.load(stream), threshold)
+        if regressions:
+            print "Regressions (threshold %.0f%%):" % (100 * threshold)
+            for regression in regressions:
+                print "  " + regression
+            sys.exit(1)
+        print "No regressions (threshold %.0f%%)." % (100 * threshold)
+        if over_budget:
+            sys.exit(1)
+    else:
+        print "No baseline found at %s, run with --save_baseline to create one." % baseline_file
+        if over_budget:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,13 +1,18 @@
-from random import  randint
+import random
 
-import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 
+from CommonGraphStatistics import CommonGraphStatistics
+from CompactGraph import CompactGraph
+from GenerationMetrics import NO_METRICS
+from GraphModels import GraphModels
 from GraphParameters import GraphParameters
 
 
 class CommonGraphGenerator:
-    def __init__(self, min_no_of_nodes=1, max_no_of_nodes=10, probability_for_edge_creation=0):
+    def __init__(self, min_no_of_nodes=1, max_no_of_nodes=10, probability_for_edge_creation=0, direct_sampling=False,
+                 rng=None, metrics=None, average_degree=None, model=None, model_parameters=None):
         """ Initialize parameters for generating a connected graph G using networkx library.
         Paramters
         ---------
@@ -20,25 +25,67 @@ class CommonGraphGenerator:
         probability_edge_creation: probability of edge creation, optional
                          default value is 0
 
+        direct_sampling: build the connected graph in one pass (random spanning tree plus
+                         G(n,p) edges) instead of regenerating until connected, optional
+                         default value is False
+
+        rng: random number generator (random.Random instance) used for all random decisions, optional
+                         default is the random module
+
+        metrics: GenerationMetrics recording the duration of the generation and the number of regeneration
+                         retries, optional (default: disabled)
+
+        average_degree: target average node degree of the graphs generated by generate_compact_graph, optional.
+                         When given, the graph gets exactly round(no. of nodes * average_degree / 2) edges
+                         (at least a spanning tree) instead of using probability_edge_creation.
+
+        model: random graph model of the common graph (see GraphModels.MODELS, e.g. 'barabasi_albert'), optional.
+                         The graph is drawn with the model and made connected directly; its target average
+                         degree is average_degree, or probability_edge_creation * (no. of nodes - 1), or
+                         GraphModels.DEFAULT_AVERAGE_DEGREE if neither is given.
+                         default is None (G(n,p) graphs regenerated until connected, see generate_graph)
+
+        model_parameters: dictionary of model parameters (e.g. {'rewiring': 0.2}, may include average_degree),
+                         optional
+
         Examples
         --------
         >>> G = CommonGraphGenerator()
         >>> G = CommonGraphGenerator(1,10, 0.1)
+        >>> G = CommonGraphGenerator(1,10, 0.1, direct_sampling=True)
+        >>> G = CommonGraphGenerator(1,10, 0.1, rng=random.Random(42))
+        >>> G = CommonGraphGenerator(1000000, 1000000, average_degree=8)
+        >>> G = CommonGraphGenerator(100, 200, model='watts_strogatz', average_degree=6)
         """
+        if model is not None:
+            GraphModels.check_model(model, model_parameters or {})
+        self.rng = rng if rng is not None else random
+        self.metrics = metrics if metrics is not None else NO_METRICS
         self.min_of_nodes = min_no_of_nodes
         self.max_of_nodes = max_no_of_nodes
         self.probability_for_edge_creation = probability_for_edge_creation
+        self.direct_sampling = direct_sampling
+        self.model = model
+        self.model_parameters = dict(model_parameters or {})
+        model_average_degree = self.model_parameters.pop('average_degree', None)
+        self.average_degree = average_degree if average_degree is not None else model_average_degree
+        self.effective_probability = None  # edge density of the last generated graph
         self.current_graph = None
 
     def generate_graph(self):
         """
         Generate a networkx connected graph with the parameters entered during the initialization.
 
-        The graphs will be generated using the erdos_renyi_graph algorithm of networkx library.
+        The graphs will be generated using the erdos_renyi_graph algorithm (G(n,p), see gnp_random_graph).
         If the specified probablity of edge creation is too low, the resultant graph might
         not become a connected graph. To avoid this issue, the probably will be increased
         in 0.05 increments after trying 5 iterations of graph generations with the current
         probability.
+        If direct_sampling was requested, the graph is built in a single pass with
+        connected_gnp_random_graph() and the probability is never changed.
+        If a model was given, the graph is drawn with it (see GraphModels) and is connected directly.
+        After generation, effective_probability holds the edge density of the graph
+        (number of edges / number of possible edges).
 
         Paramters
         ----------
@@ -53,29 +100,280 @@ class CommonGraphGenerator:
         >>> G = CommonGraphGenerator()
         >>> graph = G.generate_graph()
         """
+        start = self.metrics.start()
         generated_graph = None
         iteration = 0
 
-        no_of_nodes = randint(self.min_of_nodes, self.max_of_nodes)
+        no_of_nodes = self.rng.randint(self.min_of_nodes, self.max_of_nodes)
+        if self.model is not None:
+            generated_graph = GraphModels.connected_graph(self.model, no_of_nodes, self.rng,
+                                                          self.model_average_degree(no_of_nodes),
+                                                          **self.model_parameters)
+        elif self.direct_sampling:
+            generated_graph = CommonGraphGenerator.connected_gnp_random_graph(no_of_nodes,
+                                                                             self.probability_for_edge_creation,
+                                                                             self.rng)
         while generated_graph is None or not nx.is_connected(
                 generated_graph):  # make sure the generated graph is connected
-            generated_graph = nx.erdos_renyi_graph(no_of_nodes, self.probability_for_edge_creation, directed=False)
+            if generated_graph is not None:
+                self.metrics.count('regeneration_retries')
+            generated_graph = CommonGraphGenerator.gnp_random_graph(no_of_nodes, self.probability_for_edge_creation,
+                                                                   self.rng)
             iteration += 1
             if iteration > 5:
                 self.probability_for_edge_creation += 0.05
                 iteration = 0
 
+        possible_edges = no_of_nodes * (no_of_nodes - 1) / 2.0
+        self.effective_probability = generated_graph.number_of_edges() / possible_edges if possible_edges else 0.0
         self.current_graph = generated_graph
         self.add_attributes_to_nodes()
+        self.metrics.stop('common_graph', start)
         return generated_graph
 
+    def model_average_degree(self, no_of_nodes):
+        """
+        :return: target average degree of a graph drawn with the model
+        """
+        if self.average_degree is not None:
+            return self.average_degree
+        if self.probability_for_edge_creation > 0:
+            return self.probability_for_edge_creation * max(no_of_nodes - 1, 0)
+        return GraphModels.DEFAULT_AVERAGE_DEGREE
+
+    @staticmethod
+    def gnp_random_graph(no_of_nodes, probability_for_edge_creation, rng=random):
+        """
+        Generate an Erdos-Renyi G(n,p) graph (same model as networkx erdos_renyi_graph) drawing all
+        random numbers from the given generator.
+
+        Paramters
+        ----------
+        no_of_nodes : number of nodes
+
+        probability_for_edge_creation : probability of an edge between any two nodes
+
+        rng : random number generator (random.Random instance), optional
+
+        Returns
+        -------
+        networkx graph
+        """
+        graph = nx.Graph()
+        graph.name = "gnp_random_graph(%s,%s)" % (no_of_nodes, probability_for_edge_creation)
+        graph.add_nodes_from(range(no_of_nodes))
+        graph.add_edges_from(CommonGraphGenerator.gnp_edges(no_of_nodes, probability_for_edge_creation, rng))
+        return graph
+
+    @staticmethod
+    def gnp_edges(no_of_nodes, probability_for_edge_creation, rng=random):
+        """
+        Yield the edges of a G(n,p) graph in O(V+E) (see GraphModels.gnp_edges).
+        """
+        return GraphModels.gnp_edges(no_of_nodes, probability_for_edge_creation, rng)
+
+    @staticmethod
+    def connected_gnp_random_graph(no_of_nodes, probability_for_edge_creation, rng=random):
+        """
+        Generate a connected G(n,p)-like graph in one pass with O(V+E) cost.
+        A random spanning tree (random recursive tree over a shuffled node order) guarantees
+        connectivity, then every other node pair becomes an edge with the given probability
+        (see gnp_edges).
+
+        Paramters
+        ----------
+        no_of_nodes : number of nodes
+
+        probability_for_edge_creation : probability of an edge between any two nodes (besides the tree)
+
+        rng : random number generator (random.Random instance), optional
+
+        Returns
+        -------
+        networkx graph
+        """
+        graph = nx.Graph()
+        graph.name = "connected_gnp_random_graph(%s,%s)" % (no_of_nodes, probability_for_edge_creation)
+        graph.add_nodes_from(range(no_of_nodes))
+
+        order = list(range(no_of_nodes))
+        rng.shuffle(order)
+        for i in range(1, no_of_nodes):
+            graph.add_edge(order[i], order[rng.randint(0, i - 1)])
+
+        # pairs already in the tree are simply kept
+        graph.add_edges_from(CommonGraphGenerator.gnp_edges(no_of_nodes, probability_for_edge_creation, rng))
+        return graph
+
+    def generate_compact_graph(self):
+        """
+        Generate a connected graph as a CompactGraph (numpy arrays instead of networkx dictionaries), for
+        graphs too large for networkx. The graph is always built in one pass (see connected_gnp_compact_graph, or
+        connected_compact_graph if an average degree was given), the node types are assigned as codes and
+        effective_probability is set as in generate_graph. If a model was given, its edges are drawn as in
+        generate_graph and stored in numpy arrays.
+        Time and memory are roughly linear in the number of nodes and edges, so sparse graphs with millions
+        of nodes can be generated.
+
+        Returns
+        -------
+        CompactGraph (use to_networkx() to convert it)
+
+        Examples
+        --------
+        >>> G = CommonGraphGenerator(100000, 100000, 0.0001)
+        >>> graph = G.generate_compact_graph()
+        """
+        start = self.metrics.start()
+        no_of_nodes = self.rng.randint(self.min_of_nodes, self.max_of_nodes)
+        numpy_rng = GraphParameters.numpy_rng(self.rng)
+        if self.model is not None:
+            edges = np.array(GraphModels.connected_edges(self.model, no_of_nodes, self.rng,
+                                                         self.model_average_degree(no_of_nodes),
+                                                         **self.model_parameters), dtype=np.int64).reshape(-1, 2)
+            generated_graph = CompactGraph(no_of_nodes, edges[:, 0], edges[:, 1],
+                                           GraphParameters.get_node_type_codes(no_of_nodes, numpy_rng))
+            generated_graph.graph['name'] = "%s(%s,%s)" % (self.model, no_of_nodes,
+                                                           self.model_average_degree(no_of_nodes))
+        elif self.average_degree is not None:
+            generated_graph = CommonGraphGenerator.connected_compact_graph(
+                no_of_nodes, int(round(no_of_nodes * self.average_degree / 2.0)), numpy_rng)
+        else:
+            generated_graph = CommonGraphGenerator.connected_gnp_compact_graph(no_of_nodes,
+                                                                               self.probability_for_edge_creation,
+                                                                               numpy_rng)
+        generated_graph.cached_component_labels = np.zeros(no_of_nodes, dtype=np.int64)  # connected by construction
+        possible_edges = no_of_nodes * (no_of_nodes - 1) / 2.0
+        self.effective_probability = generated_graph.number_of_edges() / possible_edges if possible_edges else 0.0
+        self.current_graph = generated_graph
+        self.metrics.stop('common_graph', start)
+        return generated_graph
+
+    @staticmethod
+    def connected_gnp_compact_graph(no_of_nodes, probability_for_edge_creation, rng=None):
+        """
+        Vectorized version of connected_gnp_random_graph: a random recursive spanning tree plus G(n,p) edges,
+        drawn with numpy. Memory is O(V+E) numpy integers, node types are drawn with GraphParameters.
+
+        Paramters
+        ----------
+        no_of_nodes : number of nodes
+
+        probability_for_edge_creation : probability of an edge between any two nodes (besides the tree)
+
+        rng : numpy random generator (see GraphParameters.numpy_rng), optional
+
+        Returns
+        -------
+        CompactGraph
+        """
+        rng = rng if rng is not None else GraphParameters.numpy_rng()
+        order = rng.permutation(no_of_nodes)
+        # node i of the order is attached to a uniformly chosen node before it
+        tree_parents = order[(rng.uniform(size=max(no_of_nodes - 1, 0)) * np.arange(1, no_of_nodes)).astype(np.int64)]
+        tree_indices = CommonGraphGenerator.pair_indices(order[1:], tree_parents)
+        indices = CommonGraphGenerator.gnp_pair_indices(no_of_nodes, probability_for_edge_creation, rng)
+        indices = np.concatenate((tree_indices, indices[~np.in1d(indices, tree_indices)]))
+        sources, targets = CommonGraphGenerator.pairs_from_indices(indices)
+        graph = CompactGraph(no_of_nodes, sources, targets, GraphParameters.get_node_type_codes(no_of_nodes, rng))
+        graph.graph['name'] = "connected_gnp_compact_graph(%s,%s)" % (no_of_nodes, probability_for_edge_creation)
+        return graph
+
+    @staticmethod
+    def connected_compact_graph(no_of_nodes, no_of_edges, rng=None):
+        """
+        Generate a connected graph with a given number of edges: a random recursive spanning tree (as in
+        connected_gnp_compact_graph) plus uniformly chosen distinct node pairs not in the tree.
+
+        Paramters
+        ----------
+        no_of_nodes : number of nodes
+
+        no_of_edges : number of edges, clipped to the range of no_of_nodes - 1 (tree) to all node pairs
+
+        rng : numpy random generator (see GraphParameters.numpy_rng), optional
+
+        Returns
+        -------
+        CompactGraph
+        """
+        rng = rng if rng is not None else GraphParameters.numpy_rng()
+        no_of_pairs = no_of_nodes * (no_of_nodes - 1) // 2
+        order = rng.permutation(no_of_nodes)
+        tree_parents = order[(rng.uniform(size=max(no_of_nodes - 1, 0)) * np.arange(1, no_of_nodes)).astype(np.int64)]
+        tree_indices = CommonGraphGenerator.pair_indices(order[1:], tree_parents)
+        no_of_extra_edges = min(max(no_of_edges, len(tree_indices)), no_of_pairs) - len(tree_indices)
+        if 2 * (no_of_extra_edges + len(tree_indices)) > no_of_pairs:  # dense: choose among all the other pairs
+            candidates = rng.permutation(np.setdiff1d(np.arange(no_of_pairs, dtype=np.int64), tree_indices))
+        else:  # drawing enough pairs for the ones falling on the tree keeps it O(V+E)
+            candidates = CommonGraphGenerator.distinct_integers(no_of_pairs, no_of_extra_edges + len(tree_indices),
+                                                                rng)
+            candidates = candidates[~np.in1d(candidates, tree_indices)]
+        indices = np.concatenate((tree_indices, candidates[:no_of_extra_edges]))
+        sources, targets = CommonGraphGenerator.pairs_from_indices(indices)
+        graph = CompactGraph(no_of_nodes, sources, targets, GraphParameters.get_node_type_codes(no_of_nodes, rng))
+        graph.graph['name'] = "connected_compact_graph(%s,%s)" % (no_of_nodes, no_of_edges)
+        return graph
+
+    @staticmethod
+    def gnp_pair_indices(no_of_nodes, probability_for_edge_creation, rng):
+        """
+        Draw the edges of a G(n,p) graph as node pair indices (see pairs_from_indices): the number of edges is
+        binomial, then that many distinct pairs are drawn uniformly.
+        :return: numpy int64 array of pair indices
+        """
+        no_of_pairs = no_of_nodes * (no_of_nodes - 1) // 2
+        if probability_for_edge_creation >= 1:
+            return np.arange(no_of_pairs, dtype=np.int64)
+        if probability_for_edge_creation <= 0 or no_of_pairs == 0:
+            return np.empty(0, dtype=np.int64)
+        no_of_edges = int(rng.binomial(no_of_pairs, probability_for_edge_creation))
+        if 2 * no_of_edges > no_of_pairs:  # dense: draw the pairs left out instead
+            left_out = CommonGraphGenerator.distinct_integers(no_of_pairs, no_of_pairs - no_of_edges, rng)
+            return np.setdiff1d(np.arange(no_of_pairs, dtype=np.int64), left_out)
+        return CommonGraphGenerator.distinct_integers(no_of_pairs, no_of_edges, rng)
+
+    @staticmethod
+    def distinct_integers(high, size, rng):
+        """
+        :return: a uniformly chosen set of size distinct integers in the range of 0 to high - 1 (size <= high / 2)
+        """
+        drawn = np.empty(0, dtype=np.int64)
+        while len(drawn) < size:
+            drawn = np.unique(np.concatenate((drawn, GraphParameters.random_integers(
+                rng, 0, high - 1, size - len(drawn) + 16).astype(np.int64))))
+        return rng.permutation(drawn)[:size]
+
+    @staticmethod
+    def pair_indices(sources, targets):
+        """
+        :return: index of each node pair in the enumeration (1, 0), (2, 0), (2, 1), (3, 0), ...
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        high = np.maximum(sources, targets)
+        return high * (high - 1) // 2 + np.minimum(sources, targets)
+
+    @staticmethod
+    def pairs_from_indices(indices):
+        """
+        Inverse of pair_indices.
+        :return: (sources, targets) arrays
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        high = ((1 + np.sqrt(1 + 8.0 * indices)) / 2).astype(np.int64)
+        high -= high * (high - 1) // 2 > indices  # correct floating point rounding
+        high += (high + 1) * high // 2 <= indices
+        return high, indices - high * (high - 1) // 2
+
     def add_attributes_to_nodes(self):
         """
         private method that attaches some attributes for nodes (e.g. node type, node name)
         node type is randomly assigned and computed from GraphParameters class.
         """
-        for node in self.current_graph.nodes():
-            node_type = GraphParameters.get_node_type()
+        node_types = GraphParameters.get_node_types(self.current_graph.number_of_nodes(),
+                                                    GraphParameters.numpy_rng(self.rng))
+        for (node, node_type) in zip(self.current_graph.nodes(), node_types):
             self.current_graph.node[node]["type"] = node_type
             self.current_graph.node[node]["name"] = "node" + str(node)
 
@@ -83,19 +381,20 @@ class CommonGraphGenerator:
         """
         This is for debugging purpose. This one lists all the nodes and their types in the console.
         """
-        for node in self.current_graph.nodes():
-            print "node %d - type = %s" % (node, self.current_graph.node[node]["type"])
+        for (node, data) in self.current_graph.nodes(data=True):
+            print "node %d - type = %s" % (node, data["type"])
 
     def save_nodes_and_edges(self, file_path):
         """
-        Writes nodes and edges of the common graph.
+        Writes nodes and edges of the common graph (one text line each, appended to the file). See save_statistics
+        for a structured output.
         """
         try:
             with open(file_path, "a") as stat_file:
                 stat_file.write("number of nodes:%s \t number of edges:%s\n" % (
                 self.current_graph.number_of_nodes(), self.current_graph.number_of_edges()))
-                for node in self.current_graph.nodes():
-                    stat_file.write("node %d - type = %s\n" % (node, self.current_graph.node[node]["type"]))
+                for (node, data) in self.current_graph.nodes(data=True):
+                    stat_file.write("node %d - type = %s\n" % (node, data["type"]))
 
                 for (fr, to) in self.current_graph.edges():
                     stat_file.write("edge (from, to): (%s, %s)\n" % (fr, to))
@@ -103,9 +402,18 @@ class CommonGraphGenerator:
         except IOError:
             raise ("Unable to write to the specified file.")
 
+    def save_statistics(self, folder_path, output_format='csv', summary_only=False,
+                        chunk_size=CommonGraphStatistics.CHUNK_SIZE):
+        """
+        Write the JSON summary (counts, degree histogram, node types) and, unless summary_only, the CSV or npz
+        node and edge lists of the common graph to a folder (see CommonGraphStatistics).
+        :return: list of the written file paths
+        """
+        return CommonGraphStatistics.write(self.current_graph, folder_path, output_format, summary_only, chunk_size)
+
     def show(self):
         """
-        Display a generated connected graph using matplotlib library.
+        Display a generated connected graph using matplotlib library (see GraphVisualiser).
 
         Paramters
         ----------
@@ -122,14 +430,10 @@ class CommonGraphGenerator:
         >>> G.show()
         """
         if self.current_graph:
-            # nx.draw_networkx(self.current_graph)
-            # plt.show()
-            pos = nx.spring_layout(self.current_graph)
-            nx.draw(self.current_graph, pos, with_labels=True)
-            node_labels = nx.get_node_attributes(self.current_graph, 'type')
-            nx.draw_networkx_labels(self.current_graph, pos, labels=node_labels)
-            # edge_labels = nx.get_edge_attributes(G,'state')
-            # nx.draw_networkx_edge_labels(G, pos, labels = edge_labels)
-            plt.show()
+            graph = self.current_graph
+            if isinstance(graph, CompactGraph):
+                graph = graph.to_networkx()
+            from GraphVisualiser import GraphVisualiser  # loads matplotlib, only when displaying
+            GraphVisualiser.show_graph(graph, with_labels=True)
         else:
             raise Exception('No graph to visualise!')
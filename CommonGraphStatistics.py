@@ -0,0 +1,105 @@
+import json
+import os
+
+import numpy as np
+
+from CompactGraph import CompactGraph
+from GraphParameters import GraphParameters
+from GraphSetArchive import GraphSetArchive
+
+
+class CommonGraphStatistics:
+    """
+    Structured output of a common graph (replaces the text dump of CommonGraphGenerator.save_nodes_and_edges):
+    - common_graph_summary.json: numbers of nodes, edges and components, density, average and maximum degree,
+      degree histogram (number of nodes of each degree, from 0) and number of nodes of each type
+    - the node and edge lists, unless only the summary is written:
+      'csv': common_graph_nodes.csv ("node,type" rows) and common_graph_edges.csv ("source,target" rows)
+      'npz': common_graph.npz with the node_type (code of each node, see node_type_names), source and target
+             (of each edge) arrays, as in GraphSetArchive
+    The graph is converted to arrays once (see CompactGraph) and every file is written in bulk, chunk_size rows
+    at a time, and replaced (so writing twice to the same folder does not duplicate the content).
+
+    Examples
+    --------
+    >>> CommonGraphStatistics.write(graph, "./set1")
+    >>> CommonGraphStatistics.write(graph, "./large", summary_only=True)
+    """
+
+    FORMATS = ['csv', 'npz']
+    SUMMARY_FILE_NAME = "common_graph_summary.json"
+    CSV_FILE_NAMES = ("common_graph_nodes.csv", "common_graph_edges.csv")
+    NPZ_FILE_NAME = "common_graph.npz"
+    CHUNK_SIZE = 1 << 16
+
+    @staticmethod
+    def check_format(output_format):
+        """
+        :raise ValueError: for an unknown format
+        """
+        if output_format not in CommonGraphStatistics.FORMATS:
+            raise ValueError("Unknown common graph statistics format: %s (use one of %s)" % (
+                output_format, ", ".join(CommonGraphStatistics.FORMATS)))
+
+    @staticmethod
+    def summary(graph):
+        """
+        :param graph: networkx graph (nodes numbered from 0) or CompactGraph
+        :return: dictionary of the statistics of the graph (see common_graph_summary.json)
+        """
+        if not isinstance(graph, CompactGraph):
+            graph = CompactGraph.from_networkx(graph)
+        no_of_nodes = graph.number_of_nodes()
+        no_of_edges = graph.number_of_edges()
+        degrees = graph.degrees()
+        type_counts = np.bincount(graph.node_type_array(), minlength=len(GraphParameters.NODE_TYPES))
+        return {'nodes': no_of_nodes,
+                'edges': no_of_edges,
+                'components': graph.number_of_components(),
+                'density': 2.0 * no_of_edges / (no_of_nodes * (no_of_nodes - 1)) if no_of_nodes > 1 else 0.0,
+                'average_degree': 2.0 * no_of_edges / no_of_nodes if no_of_nodes else 0.0,
+                'max_degree': int(degrees.max()) if no_of_nodes else 0,
+                'degree_histogram': np.bincount(degrees).tolist(),
+                'node_types': dict(zip(GraphParameters.NODE_TYPES, type_counts.tolist()))}
+
+    @staticmethod
+    def write(graph, folder_path, output_format='csv', summary_only=False, chunk_size=CHUNK_SIZE):
+        """
+        Write the summary and (unless summary_only) the node and edge lists of a graph to a folder.
+        :param graph: networkx graph (nodes numbered from 0) or CompactGraph
+        :param folder_path: output folder
+        :param output_format: format of the node and edge lists (see FORMATS), optional
+        :param summary_only: whether to write the summary only (e.g. for large graphs), optional
+        :param chunk_size: number of CSV rows formatted at a time, optional
+        :return: list of the written file paths
+        """
+        CommonGraphStatistics.check_format(output_format)
+        if not isinstance(graph, CompactGraph):
+            graph = CompactGraph.from_networkx(graph)
+        file_paths = [os.path.join(folder_path, CommonGraphStatistics.SUMMARY_FILE_NAME)]
+        with open(file_paths[0], "w") as stream:
+            json.dump(CommonGraphStatistics.summary(graph), stream, indent=2, sort_keys=True)
+        if summary_only:
+            return file_paths
+        sources, targets = graph.edge_arrays()
+        if output_format == 'npz':
+            file_paths.append(os.path.join(folder_path, CommonGraphStatistics.NPZ_FILE_NAME))
+            GraphSetArchive.save_npz(file_paths[-1], {'node_type_names': np.array(GraphParameters.NODE_TYPES),
+                                                      'node_type': graph.node_type_array(), 'source': sources,
+                                                      'target': targets}, compressed=False)
+        else:
+            type_names = graph.node_type_names()
+            nodes_path, edges_path = [os.path.join(folder_path, name)
+                                      for name in CommonGraphStatistics.CSV_FILE_NAMES]
+            file_paths.extend([nodes_path, edges_path])
+            with open(nodes_path, "w") as stream:
+                stream.write("node,type\n")
+                for first in range(0, graph.number_of_nodes(), chunk_size):
+                    names = type_names[first:first + chunk_size].tolist()
+                    stream.write("".join("%d,%s\n" % row for row in enumerate(names, first)))
+            with open(edges_path, "w") as stream:
+                stream.write("source,target\n")
+                for first in range(0, len(sources), chunk_size):
+                    rows = zip(sources[first:first + chunk_size].tolist(), targets[first:first + chunk_size].tolist())
+                    stream.write("".join("%d,%d\n" % row for row in rows))
+        return file_paths
@@ -0,0 +1,274 @@
+import networkx as nx
+import numpy as np
+
+from GraphParameters import GraphParameters
+
+
+class CompactGraph:
+    """
+    Array-backed undirected graph used by the generators for large graphs.
+    Nodes are numbered from 0 to number_of_nodes() - 1 and only their type is stored, as a small integer code
+    (index into GraphParameters.NODE_TYPES); the node name is derived from the id ("node" + id).
+    Node types and edges are stored as chunks of numpy arrays, so adding nodes or edges never copies the existing
+    ones and a variant can share the arrays of the graph it is based on.
+    This costs 8 bytes per edge and 1 byte per node instead of the dictionaries of a networkx graph.
+    The read methods used for saving graphs (graph, nodes, edges, number_of_nodes, number_of_edges) are
+    available, to_networkx() converts to a networkx graph when one is needed.
+    """
+
+    NODE_DTYPE = np.int32
+
+    def __init__(self, no_of_nodes=0, sources=(), targets=(), node_types=None, graph=None):
+        """
+        :param no_of_nodes: number of nodes
+        :param sources: edge source nodes (array-like)
+        :param targets: edge target nodes (array-like, same length as sources)
+        :param node_types: node type codes (array-like), optional (default: all nodes get the first type)
+        :param graph: graph attributes (dictionary), optional
+        """
+        self.no_of_nodes = no_of_nodes
+        node_types = np.zeros(no_of_nodes, dtype=np.int8) if node_types is None else np.asarray(
+            node_types, dtype=np.int8)
+        if len(node_types) != no_of_nodes:
+            raise ValueError("Expected %d node types, got %d." % (no_of_nodes, len(node_types)))
+        self.node_type_chunks = [node_types]  # list of node type code arrays
+        self.graph = dict(graph) if graph is not None else {}
+        self.edge_chunks = []  # list of (sources, targets) arrays
+        self.no_of_edges = 0
+        self.cached_edge_keys = None  # sorted keys of the edges (see has_edges)
+        self.added_edge_keys = None  # sorted keys of the edges added after cached_edge_keys was built
+        self.cached_component_labels = None
+        self.add_edges(sources, targets)
+
+    def __len__(self):
+        return self.no_of_nodes
+
+    @staticmethod
+    def from_networkx(graph):
+        """
+        :param graph: networkx graph with nodes numbered from 0 and a 'type' node attribute (see GraphParameters)
+        :return: CompactGraph
+        """
+        no_of_nodes = graph.number_of_nodes()
+        node_types = np.zeros(no_of_nodes, dtype=np.int8)
+        for (node, data) in graph.nodes(data=True):
+            if not 0 <= node < no_of_nodes:
+                raise ValueError("Nodes must be numbered from 0 to %d, got %s." % (no_of_nodes - 1, node))
+            if 'type' in data:
+                node_types[node] = GraphParameters.NODE_TYPES.index(data['type'])
+        edges = np.asarray(graph.edges(), dtype=CompactGraph.NODE_DTYPE).reshape(-1, 2)
+        return CompactGraph(no_of_nodes, edges[:, 0], edges[:, 1], node_types, graph.graph)
+
+    def to_networkx(self):
+        """
+        :return: new networkx graph with the nodes (name and type attributes), edges and attributes of the graph
+        """
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes(data=True))
+        graph.add_edges_from(self.edges())
+        graph.graph = dict(self.graph)
+        return graph
+
+    def variant(self):
+        """
+        :return: new CompactGraph with the nodes, edges and attributes of this graph. The node type and edge
+                 arrays are shared (not copied), so adding nodes or edges to the variant costs O(added nodes and
+                 edges) (plus the edge keys of this graph, sorted once and shared by all its variants).
+        """
+        variant = CompactGraph(graph=self.graph)
+        variant.no_of_nodes = self.no_of_nodes
+        variant.node_type_chunks = list(self.node_type_chunks)
+        variant.edge_chunks = list(self.edge_chunks)
+        variant.no_of_edges = self.no_of_edges
+        variant.cached_edge_keys = self.get_edge_keys()
+        variant.added_edge_keys = np.empty(0, dtype=np.int64)
+        return variant
+
+    def number_of_nodes(self):
+        return self.no_of_nodes
+
+    def number_of_edges(self):
+        return self.no_of_edges
+
+    def add_nodes(self, node_types):
+        """
+        Add nodes numbered after the existing ones.
+        :param node_types: node type codes of the new nodes
+        :return: id of the first new node
+        """
+        first = self.no_of_nodes
+        node_types = np.asarray(node_types, dtype=np.int8)
+        self.node_type_chunks.append(node_types)
+        self.no_of_nodes += len(node_types)
+        self.cached_component_labels = None
+        return first
+
+    def node_type_array(self):
+        """
+        :return: array with the node type code of each node
+        """
+        if len(self.node_type_chunks) > 1:
+            self.node_type_chunks = [np.concatenate(self.node_type_chunks)]
+        return self.node_type_chunks[0]
+
+    def add_edges(self, sources, targets):
+        """
+        Add edges (the caller makes sure they are new and are not self-loops, see has_edges).
+        :param sources: source nodes (array-like)
+        :param targets: target nodes (array-like)
+        :return: None
+        """
+        sources = np.asarray(sources, dtype=CompactGraph.NODE_DTYPE)
+        targets = np.asarray(targets, dtype=CompactGraph.NODE_DTYPE)
+        if len(sources) != len(targets):
+            raise ValueError("Sources and targets must have the same length.")
+        if len(sources):
+            self.edge_chunks.append((sources, targets))
+            self.no_of_edges += len(sources)
+            if self.cached_edge_keys is not None:  # keep the sorted keys up to date in O(added edges)
+                self.added_edge_keys = np.sort(np.concatenate((self.added_edge_keys,
+                                                               CompactGraph.edge_keys(sources, targets))))
+            self.cached_component_labels = None
+
+    def add_edge(self, fr, to):
+        self.add_edges([fr], [to])
+
+    def edge_arrays(self):
+        """
+        :return: (sources, targets) arrays of all the edges
+        """
+        if len(self.edge_chunks) == 0:
+            return np.empty(0, CompactGraph.NODE_DTYPE), np.empty(0, CompactGraph.NODE_DTYPE)
+        if len(self.edge_chunks) > 1:
+            self.edge_chunks = [(np.concatenate([sources for (sources, targets) in self.edge_chunks]),
+                                 np.concatenate([targets for (sources, targets) in self.edge_chunks]))]
+        return self.edge_chunks[0]
+
+    @staticmethod
+    def edge_keys(sources, targets):
+        """
+        :return: int64 key of each edge, the same for both directions
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        return (np.minimum(sources, targets) << 32) | np.maximum(sources, targets)
+
+    def get_edge_keys(self):
+        """
+        :return: sorted keys of the edges that were in the graph when first called (see added_edge_keys)
+        """
+        if self.cached_edge_keys is None:
+            self.cached_edge_keys = np.sort(CompactGraph.edge_keys(*self.edge_arrays()))
+            self.added_edge_keys = np.empty(0, dtype=np.int64)
+        return self.cached_edge_keys
+
+    @staticmethod
+    def contains_keys(sorted_keys, keys):
+        if len(sorted_keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        return sorted_keys[positions] == keys
+
+    def has_edges(self, sources, targets):
+        """
+        :return: boolean array, True for each (source, target) pair that is an edge of the graph
+        """
+        keys = CompactGraph.edge_keys(sources, targets)
+        return CompactGraph.contains_keys(self.get_edge_keys(), keys) | CompactGraph.contains_keys(
+            self.added_edge_keys, keys)
+
+    def degrees(self):
+        """
+        :return: array with the degree of each node
+        """
+        sources, targets = self.edge_arrays()
+        return np.bincount(sources, minlength=self.no_of_nodes) + np.bincount(targets, minlength=self.no_of_nodes)
+
+    def csr(self):
+        """
+        Compressed sparse row adjacency: the neighbours of node i are indices[indptr[i]:indptr[i + 1]].
+        :return: (indptr, indices) arrays
+        """
+        sources, targets = self.edge_arrays()
+        rows = np.concatenate((sources, targets))
+        columns = np.concatenate((targets, sources))
+        order = np.argsort(rows, kind='mergesort')
+        indptr = np.zeros(self.no_of_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.no_of_nodes), out=indptr[1:])
+        return indptr, columns[order]
+
+    @staticmethod
+    def connect_labels(labels, sources, targets):
+        """
+        Merge the components of the given edges (vectorized union-find: the larger root is hooked under the
+        smaller one, then the labels are shortcut to the roots).
+        :param labels: component label of each node (the label is the smallest node of the component), updated
+        :param sources: edge source nodes
+        :param targets: edge target nodes
+        :return: None
+        """
+        sources = np.asarray(sources)
+        targets = np.asarray(targets)
+        while True:
+            label_sources = labels[sources]
+            label_targets = labels[targets]
+            different = label_sources != label_targets
+            if not different.any():
+                return
+            sources = sources[different]
+            targets = targets[different]
+            low = np.minimum(label_sources[different], label_targets[different])
+            high = np.maximum(label_sources[different], label_targets[different])
+            np.minimum.at(labels, high, low)  # high is a root, so its component moves under low
+            while True:
+                shortcut = labels[labels]
+                if np.array_equal(shortcut, labels):
+                    break
+                labels[:] = shortcut
+
+    def component_labels(self):
+        """
+        :return: array with the component label (smallest node of the component) of each node
+        """
+        if self.cached_component_labels is None:
+            labels = np.arange(self.no_of_nodes, dtype=np.int64)
+            CompactGraph.connect_labels(labels, *self.edge_arrays())
+            self.cached_component_labels = labels
+        return self.cached_component_labels
+
+    @staticmethod
+    def count_components(labels):
+        return int(np.count_nonzero(labels == np.arange(len(labels))))
+
+    def number_of_components(self):
+        return CompactGraph.count_components(self.component_labels())
+
+    def is_connected(self):
+        return self.number_of_components() == 1
+
+    def node_type_names(self):
+        """
+        :return: array with the node type (name) of each node
+        """
+        return GraphParameters.NODE_TYPE_TABLE[self.node_type_array()]
+
+    def nodes(self, data=False):
+        """
+        :return: iterator over the nodes, or (node, attribute dictionary) tuples if data is True
+        """
+        if not data:
+            return iter(range(self.no_of_nodes))
+        return ((node, {'name': "node" + str(node), 'type': node_type})
+                for (node, node_type) in enumerate(self.node_type_names().tolist()))
+
+    def edges(self, data=False):
+        """
+        :return: iterator over the (source, target) edges, or (source, target, {}) tuples if data is True
+        """
+        for (sources, targets) in self.edge_chunks:
+            if data:
+                for (fr, to) in zip(sources.tolist(), targets.tolist()):
+                    yield (fr, to, {})
+            else:
+                for edge in zip(sources.tolist(), targets.tolist()):
+                    yield edge
@@ -0,0 +1,185 @@
+import random
+
+
+class ConnectivityTracker:
+    """
+    Incremental connectivity tracker (disjoint-set / union-find) for undirected graphs.
+    Components are merged as edges are added, so the connectivity check is O(1) instead of a
+    full traversal of the graph after every edge round.
+    Union by size and path halving keep find() effectively constant time (paths are O(log n) long with union by
+    size alone, which bounds the lookups of the base).
+    A tracker can be stacked on top of a base tracker (e.g. the one of a common graph): the base is only
+    read, so the stacked tracker costs O(nodes and edges added to it), not O(size of the base).
+    """
+
+    def __init__(self, nodes=(), edges=(), base=None):
+        """
+        :param nodes: initial nodes (each one starts as its own component)
+        :param edges: initial edges (e.g. edges of the common graph)
+        :param base: ConnectivityTracker whose components this tracker starts from (never modified), optional
+        """
+        self.base = base
+        self.parent = {}
+        self.size = {}
+        self.members = {}  # root -> list of member lists of the component (used to draw cross-component edges)
+        self.owned = {}  # root -> the member list of the component owned (extended) by this tracker
+        self.roots = list(base.roots) if base is not None else []  # current component roots, for O(1) selection
+        self.root_index = dict(base.root_index) if base is not None else {}  # root -> position in self.roots
+        for node in nodes:
+            self.add_node(node)
+        for (fr, to) in edges:
+            self.add_edge(fr, to)
+
+    @staticmethod
+    def from_graph(graph, base=None):
+        """
+        Seed a tracker from an existing networkx graph.
+        :param graph: networkx graph
+        :param base: base tracker, optional
+        :return: ConnectivityTracker
+        """
+        return ConnectivityTracker(graph.nodes(), graph.edges(), base)
+
+    def has_node(self, node):
+        return node in self.parent or (self.base is not None and self.base.has_node(node))
+
+    def add_node(self, node):
+        """
+        Add a node as a new singleton component (ignored if the node is already tracked).
+        :param node: node id
+        :return: None
+        """
+        if not self.has_node(node):
+            self.parent[node] = node
+            self.size[node] = 1
+            self.owned[node] = [node]
+            self.members[node] = [self.owned[node]]
+            self.root_index[node] = len(self.roots)
+            self.roots.append(node)
+
+    def find(self, node):
+        """
+        :param node: node id
+        :return: root (representative) of the component containing the node
+        """
+        parent = self.parent
+        if node not in parent:
+            node = self.base.find_root(node)
+            if node not in parent:  # component of the base that has not been merged here
+                return node
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]  # path halving
+            node = parent[node]
+        return node
+
+    def find_root(self, node):
+        """
+        Same as find, without path halving: used to look up the base tracker, which is shared by all the trackers
+        stacked on it and so is never written.
+        :param node: node id
+        :return: root (representative) of the component containing the node
+        """
+        parent = self.parent
+        if node not in parent:
+            node = self.base.find_root(node)
+            if node not in parent:
+                return node
+        while parent[node] != node:
+            node = parent[node]
+        return node
+
+    def component_size(self, root):
+        if root in self.size:
+            return self.size[root]
+        return self.base.component_size(root)
+
+    def component_members(self, root):
+        """
+        :return: list of member lists of the component (shared, must not be modified)
+        """
+        if root in self.members:
+            return self.members[root]
+        return self.base.component_members(root)
+
+    def add_edge(self, fr, to):
+        """
+        Record an edge and merge the components of its end points.
+        :param fr: node id
+        :param to: node id
+        :return: True if two different components were merged, False otherwise.
+        """
+        self.add_node(fr)
+        self.add_node(to)
+        root_fr = self.find(fr)
+        root_to = self.find(to)
+        if root_fr == root_to:
+            return False
+        if self.component_size(root_fr) < self.component_size(root_to):
+            root_fr, root_to = root_to, root_fr
+        # attach the smaller component (root_to) under the larger one (root_fr)
+        self.parent[root_fr] = root_fr
+        self.parent[root_to] = root_fr
+        self.size[root_fr] = self.component_size(root_fr) + self.component_size(root_to)
+        self.size.pop(root_to, None)
+        # member lists taken from the base are shared; members of the smaller component are copied to a list
+        # owned by this tracker, so each component has at most one member list more than in the base
+        members = self.component_members(root_fr)
+        owned = self.owned.get(root_fr)
+        if owned is None:
+            owned = self.owned[root_fr] = []
+            members = members + [owned]
+        for member_list in self.component_members(root_to):
+            owned.extend(member_list)
+        self.members[root_fr] = members
+        self.members.pop(root_to, None)
+        self.owned.pop(root_to, None)
+        self._remove_root(root_to)
+        return True
+
+    def _remove_root(self, root):
+        index = self.root_index.pop(root)
+        last = self.roots.pop()
+        if last != root:  # move the last root into the freed slot
+            self.roots[index] = last
+            self.root_index[last] = index
+
+    def connected(self, fr, to):
+        """
+        :return: True if both nodes are in the same component.
+        """
+        return self.find(fr) == self.find(to)
+
+    def number_of_components(self):
+        return len(self.roots)
+
+    def is_connected(self):
+        """
+        :return: True if all tracked nodes form a single component (O(1)).
+        """
+        return len(self.roots) == 1
+
+    def random_member(self, root, rng=random):
+        """
+        :return: a node of the component, chosen uniformly
+        """
+        position = rng.randint(0, self.component_size(root) - 1)
+        for members in self.component_members(root):
+            if position < len(members):
+                return members[position]
+            position -= len(members)
+
+    def random_cross_component_pair(self, rng=random):
+        """
+        Randomly pick two nodes from two different components (components are chosen uniformly,
+        nodes uniformly within the chosen components). Adding the returned pair as an edge always
+        reduces the number of components by one.
+        :param rng: random number generator (random.Random instance), optional
+        :return: (node, node) tuple or None if the graph is already connected.
+        """
+        if len(self.roots) < 2:
+            return None
+        first = rng.randint(0, len(self.roots) - 1)
+        second = rng.randint(0, len(self.roots) - 2)
+        if second >= first:
+            second += 1
+        return self.random_member(self.roots[first], rng), self.random_member(self.roots[second], rng)
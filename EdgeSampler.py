@@ -0,0 +1,155 @@
+from math import log
+import random
+
+
+class EdgeSampler:
+    """
+    Indexed candidate sampler for adding random edges between non-adjacent nodes.
+    Keeps an indexable node list and per-node adjacency sets, so a non-neighbour can be drawn by
+    rejection sampling (expected O(1) while the node is not densely connected) instead of scanning
+    the whole node list. Falls back to building the complement only when rejection would be slow.
+    Self-loops are never produced.
+    A sampler can be stacked on top of a base sampler (e.g. the one of a common graph): the base is only
+    read, and the stacked sampler only stores the nodes and edges added to it.
+    """
+
+    def __init__(self, graph=None, rng=random, base=None):
+        """
+        :param graph: networkx graph to index, optional
+        :param rng: random number generator (random.Random instance), optional
+        :param base: EdgeSampler whose nodes and edges this sampler starts from (never modified), optional
+        """
+        self.rng = rng
+        self.base = base
+        self.base_no_of_nodes = base.number_of_nodes() if base is not None else 0
+        self.nodes = []  # index - base_no_of_nodes -> node (nodes added to this sampler)
+        self.index = {}  # node -> index
+        self.adjacency = {}  # node -> set of neighbours (edges added to this sampler)
+        self.no_of_edges = 0  # number of edges added to this sampler
+        if graph is not None:
+            for node in graph.nodes():
+                self.add_node(node)
+            for (fr, to) in graph.edges():
+                self.add_edge(fr, to)
+
+    def number_of_nodes(self):
+        return self.base_no_of_nodes + len(self.nodes)
+
+    def number_of_edges(self):
+        return self.no_of_edges + (self.base.number_of_edges() if self.base is not None else 0)
+
+    def node_at(self, index):
+        """
+        :param index: node index (0 .. number_of_nodes() - 1)
+        :return: node id
+        """
+        if index < self.base_no_of_nodes:
+            return self.base.node_at(index)
+        return self.nodes[index - self.base_no_of_nodes]
+
+    def has_node(self, node):
+        return node in self.index or (self.base is not None and self.base.has_node(node))
+
+    def add_node(self, node):
+        if not self.has_node(node):
+            self.index[node] = self.number_of_nodes()
+            self.nodes.append(node)
+
+    def has_edge(self, fr, to):
+        return to in self.adjacency.get(fr, ()) or (self.base is not None and self.base.has_edge(fr, to))
+
+    def degree(self, node):
+        return len(self.adjacency.get(node, ())) + (self.base.degree(node) if self.base is not None else 0)
+
+    def add_edge(self, fr, to):
+        """
+        Record an edge (self-loops are ignored).
+        :return: True if the edge is new, False otherwise.
+        """
+        if fr == to or self.has_edge(fr, to):
+            return False
+        self.add_node(fr)
+        self.add_node(to)
+        self.adjacency.setdefault(fr, set()).add(to)
+        self.adjacency.setdefault(to, set()).add(fr)
+        self.no_of_edges += 1
+        return True
+
+    def number_of_non_edges(self):
+        n = self.number_of_nodes()
+        return n * (n - 1) // 2 - self.number_of_edges()
+
+    def random_nodes(self, probability):
+        """
+        Yield each node independently with the given probability, in index order. The selected nodes are
+        reached with geometric skips, so nodes that are not selected are never visited.
+        :param probability: selection probability of a node
+        """
+        n = self.number_of_nodes()
+        if probability >= 1:
+            for i in range(n):
+                yield self.node_at(i)
+        elif probability > 0:
+            log_q = log(1.0 - probability)
+            i = -1
+            while True:
+                i += 1 + int(log(1.0 - self.rng.random()) / log_q)
+                if i >= n:
+                    break
+                yield self.node_at(i)
+
+    def random_non_neighbour(self, node):
+        """
+        Randomly pick a node that is not adjacent to (and not equal to) the given node.
+        :param node: node id
+        :return: node id or None if the node is already connected to every other node.
+        """
+        n = self.number_of_nodes()
+        degree = self.degree(node)
+        if degree >= n - 1:
+            return None
+        if 2 * degree < n:
+            # at least half of the draws succeed, so the expected number of tries is below 2
+            while True:
+                candidate = self.node_at(self.rng.randint(0, n - 1))
+                if candidate != node and not self.has_edge(node, candidate):
+                    return candidate
+        return self.rng.choice([candidate for candidate in (self.node_at(i) for i in range(n))
+                                if candidate != node and not self.has_edge(node, candidate)])
+
+    def random_non_edges(self, k):
+        """
+        Draw k distinct node pairs without replacement from the pairs that are not edges yet.
+        The pairs are not added to the sampler. Cost is proportional to k while the graph (including
+        the drawn pairs) stays below half density; denser requests enumerate the complement instead.
+        :param k: number of non-edges to draw
+        :return: list of (node, node) tuples
+        """
+        available = self.number_of_non_edges()
+        if k > available:
+            raise ValueError("Cannot draw %d new edges, only %d node pairs are unconnected." % (k, available))
+        if k <= 0:
+            return []
+        n = self.number_of_nodes()
+        if 2 * (self.number_of_edges() + k) <= n * (n - 1) // 2:
+            drawn = set()
+            pairs = []
+            while len(pairs) < k:
+                i = self.rng.randint(0, n - 1)
+                j = self.rng.randint(0, n - 1)
+                if i == j:
+                    continue
+                if i > j:
+                    i, j = j, i
+                if (i, j) in drawn:
+                    continue
+                fr, to = self.node_at(i), self.node_at(j)
+                if self.has_edge(fr, to):
+                    continue
+                drawn.add((i, j))
+                pairs.append((fr, to))
+            return pairs
+        nodes = [self.node_at(i) for i in range(n)]
+        candidates = [(nodes[i], nodes[j]) for i in range(n) for j in range(i + 1, n)
+                      if not self.has_edge(nodes[i], nodes[j])]
+        return self.rng.sample(candidates, k)
@@ -1,18 +1,26 @@
-from random import randint, random, choice
+import os
+import random
 
-import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 
 from CommonGraphGenerator import CommonGraphGenerator
+from CompactGraph import CompactGraph
+from ConnectivityTracker import ConnectivityTracker
+from EdgeSampler import EdgeSampler
+from GenerationMetrics import NO_METRICS
+from GraphMLWriter import GraphMLWriter
 from GraphParameters import GraphParameters
+from GraphVariant import GraphVariant
 
 
 class GraphGenerator:
-    def __init__(self, common_graph=None, min_no_of_nodes=1, max_no_of_total_nodes=15, probability_edge_creation=0):
+    def __init__(self, common_graph=None, min_no_of_nodes=1, max_no_of_total_nodes=15, probability_edge_creation=0,
+                 rng=None, metrics=None, no_of_edges=None, average_degree=None):
         """ Initialize parameters for generating a connected graph G using networkx library.
        Paramters
        ---------
-       common_graph : A networkx graph (assumes a CommonGraphGenertor object)
+       common_graph : A networkx graph (assumes a CommonGraphGenertor object) or a CompactGraph
                         default value is None
 
        min_no_of_nodes : minimum_number of nodes, optional
@@ -23,17 +31,51 @@ class GraphGenerator:
                         default value is 10
 
        probability_edge_creation: probability of edge creation, optional
-                        default value is 0
+                        default value is 0. If set, the graphs get round(probability * number of node pairs)
+                        edges (see no_of_edges), or the edges they have once connected if that is more.
+
+       no_of_edges : target number of edges of the generated graphs, optional
+                        default is None (edges are added in random rounds until the graph is connected).
+                        The graph is connected first (exactly number of components - 1 edges), then exactly the
+                        missing number of new edges is drawn without replacement, in O(V + E) instead of
+                        repeated rounds. A ValueError is raised when the target cannot be hit exactly: more
+                        edges than node pairs, or fewer than the graph has once connected (e.g. with a dense
+                        common graph). See check_edge_target to check this before generating graphs.
+
+       average_degree : target average node degree of the generated graphs, optional
+                        same as no_of_edges = round(average_degree * number of nodes / 2), for graphs with a
+                        varying number of nodes
+
+       rng : random number generator (random.Random instance) used for all random decisions, optional
+                        default is the random module
+
+       metrics : GenerationMetrics recording stage durations, edge rounds, edges added and bytes written, optional
+                        default is disabled
 
        Examples
        --------
        >>> G = GraphGenerator()
        >>> G = GraphGenerator(min_no_of_nodes = 1,max_no_of_total_nodes = 10, probability_edge_creation= 0.1)
+       >>> G = GraphGenerator(rng = random.Random(42))
+       >>> G = GraphGenerator(common_graph, max_no_of_total_nodes = 60, average_degree = 4)
        """
+        if no_of_edges is not None and average_degree is not None:
+            raise ValueError("Give either a target number of edges or a target average degree, not both.")
 
+        self.rng = rng if rng is not None else random
+        self.metrics = metrics if metrics is not None else NO_METRICS
         self.max_no_of_total_nodes = max_no_of_total_nodes
         self.probability_edge_creation = probability_edge_creation
+        self.no_of_edges = no_of_edges
+        self.average_degree = average_degree
         self.current_graph = None
+        self.current_variant = None  # common graph + nodes and edges added by the last generation
+        self.edge_sampler = None  # indexed non-edge sampler for the current graph
+        # other representations and indexes of the common graph, built on first use and shared by all variants
+        self.common_networkx_graph = None
+        self.common_compact_graph = None
+        self.common_edge_sampler = None
+        self.common_connectivity = None
 
         self.common_graph = common_graph
         self.common_graph_no_of_nodes = 0
@@ -42,130 +84,466 @@ class GraphGenerator:
         if self.common_graph:
             self.common_graph_no_of_nodes = nx.number_of_nodes(self.common_graph)
             self.self_common_graph_node_set = nx.nodes(self.common_graph)
-            self.current_graph = self.common_graph
             self.max_number_of_possible_nodes_to_add = self.max_no_of_total_nodes - self.common_graph_no_of_nodes
 
-    def generate_graph(self, display_added_edges=False):
+    def generate_graph(self, display_added_edges=False, connect_components_only=False, design_index=None,
+                       series=None):
         """
         Main method for generating graphs. It will generate a connected graph with the pre-initialized settings (through the constructor).
+        The common graph is not modified, every call starts from it again (see generate_variant).
         :param display_added_edges:  whether to show two diagram with pre and post status after adding edges (for debugging purpose)
+        :param connect_components_only: if True, only draw edges between different components, so exactly
+                        (number of components - 1) edges are added. Otherwise random edge rounds are added until connected
+                        (unless an edge target is given, see the constructor).
+        :param design_index: number of the design name of the graph (e.g. its index in a set), optional
+                        (default: the next number of GraphParameters.get_design_name)
+        :param series: pool of serie values the graph may reuse (e.g. those of its set, see
+                        GraphParameters.get_series), optional (default: the pool of GraphParameters)
         :return: returns generated networkx graph.
         """
+        variant = self.generate_variant(connect_components_only, design_index, series)
+        self.current_graph = variant.to_networkx()
 
-        if not self.common_graph:  # if no common graph has been given, just denerate a connected graph with default settings.
-            cg = CommonGraphGenerator()
-            self.current_graph = cg.generate_graph()
-        else:
+        if display_added_edges and self.common_graph:
+            # show the pre-status before adding random edges and highlight the added edges (for debugging purpose)
+            from GraphVisualiser import GraphVisualiser  # loads matplotlib, only when displaying
+            GraphVisualiser.show_added_edges(self.current_graph, variant.added_edges)
 
-            number_of_possible_nodes_to_add = randint(0,
-                                                      self.max_number_of_possible_nodes_to_add)  # randomly decide the number of new nodes to be added to current common graph
+        return self.current_graph
 
-            while self.max_number_of_possible_nodes_to_add > 0 and number_of_possible_nodes_to_add == 0:  # try best to add aleast 1 node, if possible
-                number_of_possible_nodes_to_add = randint(0, self.max_number_of_possible_nodes_to_add)
+    def generate_variant(self, connect_components_only=False, design_index=None, series=None):
+        """
+        Generate a connected graph as a GraphVariant: the common graph plus the added nodes and edges.
+        Only the added nodes and edges are stored (the common graph and its indexes are shared by all the
+        variants), so the cost is proportional to the size of the delta. Use this instead of generate_graph
+        when the graph is only saved (see save_post_processed_graph).
+        :param connect_components_only: see generate_graph
+        :param design_index: see generate_graph
+        :param series: see generate_graph
+        :return: GraphVariant (also available as current_graph)
+        """
+        start = self.metrics.start()
+        targeted = self.has_edge_target()
+        if not self.common_graph:  # if no common graph has been given, just denerate a connected graph with default settings.
+            cg = CommonGraphGenerator(rng=self.rng)
+            variant = GraphVariant(cg.generate_graph())
+            self.current_variant = self.current_graph = variant
+            self.edge_sampler = None
+        else:
+            common_graph = self.get_common_networkx_graph()
+            if self.common_edge_sampler is None:
+                self.common_edge_sampler = EdgeSampler(common_graph)
+                self.common_connectivity = ConnectivityTracker.from_graph(common_graph)
+            variant = GraphVariant(common_graph)
+            self.current_variant = self.current_graph = variant
+            self.edge_sampler = EdgeSampler(rng=self.rng, base=self.common_edge_sampler)
 
+            number_of_possible_nodes_to_add = self.number_of_nodes_to_add()
             if number_of_possible_nodes_to_add > 0:
                 node_id = self.common_graph_no_of_nodes  # start node_id from the number of nodes already in the common graph (note that the node ids are numbered from 0)
                 # so if there were 5 nodes in the common graph (0,1,2,3,4) start adding new nodes from node 5 on wards
-                added_nodes = set()
-                for i in range(number_of_possible_nodes_to_add):
-                    node_type = GraphParameters.get_node_type()  # generate random node type
-                    self.current_graph.add_node(node_id, name="node" + str(node_id), type=node_type)
-                    added_nodes.add(node_id)
+                node_types = GraphParameters.get_node_types(number_of_possible_nodes_to_add,
+                                                            GraphParameters.numpy_rng(self.rng))  # random node types
+                for node_type in node_types:
+                    variant.add_node(node_id, name="node" + str(node_id), type=node_type)
+                    self.edge_sampler.add_node(node_id)
                     node_id += 1
 
-            if display_added_edges:  # this is for showing the pre-status before adding random edges between nodes
-                plt.figure(1);
-                plt.clf()
-                fig, ax = plt.subplots(2, 1, num=1, sharex=True, sharey=True)
-                pos = nx.spring_layout(self.current_graph)
-                nx.draw_networkx(self.current_graph, pos=pos, ax=ax[0])
-
-            is_connected = None
-            temp = []  # holds a list of randomly added edges
-            while is_connected is None or not is_connected:  # randomly add edges until the graph is connected
-                new_edges = self.add_random_edge()
-                temp.extend(new_edges)
-                is_connected = nx.is_connected(self.current_graph)
-
-            if display_added_edges:
-                # draw a new version of the graph and highlight changes for debugging purpose
-                nx.draw_networkx(self.current_graph, pos=pos, ax=ax[1])
-                nx.draw_networkx_edges(self.current_graph, pos=pos, ax=ax[1], edgelist=temp,
-                                       edge_color='b', width=4)
-                plt.show()
+            # track components incrementally, on top of the components of the common graph
+            connectivity = ConnectivityTracker(variant.added_nodes, base=self.common_connectivity)
+            while connectivity.number_of_components() > 1:  # randomly add edges until the graph is connected
+                if connect_components_only or targeted:
+                    new_edges = self.add_cross_component_edge(connectivity)
+                else:
+                    new_edges = self.add_random_edge()
+                    for (fr, to) in new_edges:
+                        connectivity.add_edge(fr, to)
+                self.metrics.count('edge_rounds')
+                self.metrics.count('edges_added', len(new_edges))
+
+        if targeted:  # then exactly the missing number of edges
+            missing = self.missing_no_of_edges(variant)
+            if missing > 0:
+                self.add_random_edges(missing)
+                self.metrics.count('edges_added', missing)
 
         # now add all the other GRAPH attributes (note the node attributes)
-        self.add_graph_attributes()
+        self.add_graph_attributes(design_index, series)
 
-        return self.current_graph
+        self.metrics.stop('generate_graph', start)
+        return variant
+
+    def generate_compact_graph(self, connect_components_only=False, design_index=None, series=None):
+        """
+        Same as generate_graph, but the graph is generated as a CompactGraph with vectorized (numpy) edge rounds,
+        for graphs too large for networkx. The common graph is not modified (the variant shares its edge arrays).
+        In each edge round every node gets a new edge with probability 0.1 (see add_random_edge); pairs that are
+        already edges, self-loops and duplicates of the round are dropped. With an edge target, the components are
+        joined by a random tree and the missing edges are drawn at once (see random_non_edge_arrays).
+        :param connect_components_only: see generate_graph
+        :param design_index: see generate_graph
+        :param series: see generate_graph
+        :return: CompactGraph (also available as current_graph)
+        """
+        start = self.metrics.start()
+        numpy_rng = GraphParameters.numpy_rng(self.rng)
+        targeted = self.has_edge_target()
+        self.edge_sampler = None
+        if not self.common_graph:
+            graph = CommonGraphGenerator(rng=self.rng).generate_compact_graph()
+            self.current_graph = graph
+        else:
+            common_graph = self.get_common_compact_graph()
+            graph = common_graph.variant()
+            self.current_graph = graph
+            number_of_possible_nodes_to_add = self.number_of_nodes_to_add()
+            if number_of_possible_nodes_to_add > 0:
+                graph.add_nodes(GraphParameters.get_node_type_codes(number_of_possible_nodes_to_add, numpy_rng))
+
+            # components of the common graph + the new nodes, merged as edges are added
+            labels = np.concatenate((common_graph.component_labels(),
+                                     np.arange(common_graph.number_of_nodes(), graph.number_of_nodes())))
+            while CompactGraph.count_components(labels) > 1:  # randomly add edges until the graph is connected
+                if connect_components_only or targeted:
+                    sources, targets = GraphGenerator.cross_component_edge_arrays(labels, numpy_rng)
+                else:
+                    sources, targets = GraphGenerator.random_edge_arrays(graph, 0.1, numpy_rng)
+                graph.add_edges(sources, targets)
+                CompactGraph.connect_labels(labels, sources, targets)
+                self.metrics.count('edge_rounds')
+                self.metrics.count('edges_added', len(sources))
+            graph.cached_component_labels = labels
+
+        if targeted:  # then exactly the missing number of edges
+            missing = self.missing_no_of_edges(graph)
+            if missing > 0:
+                labels = graph.cached_component_labels
+                graph.add_edges(*GraphGenerator.random_non_edge_arrays(graph, missing, numpy_rng))
+                graph.cached_component_labels = labels  # still connected
+                self.metrics.count('edges_added', missing)
+
+        # now add all the other GRAPH attributes (note the node attributes)
+        self.add_graph_attributes(design_index, series)
+
+        self.metrics.stop('generate_graph', start)
+        return graph
+
+    @staticmethod
+    def random_edge_arrays(graph, probability_of_new_connection, rng):
+        """
+        Vectorized edge round of a CompactGraph: each node is connected to a uniformly chosen other node with the
+        given probability, pairs that are edges already (or drawn twice) are dropped.
+        :return: (sources, targets) arrays of the new edges
+        """
+        no_of_nodes = graph.number_of_nodes()
+        if no_of_nodes < 2:
+            return np.empty(0, np.int64), np.empty(0, np.int64)
+        sources = np.flatnonzero(rng.uniform(size=no_of_nodes) < probability_of_new_connection)
+        targets = GraphParameters.random_integers(rng, 0, no_of_nodes - 2, len(sources))
+        targets += targets >= sources  # skip the node itself
+        first = np.sort(np.unique(CompactGraph.edge_keys(sources, targets), return_index=True)[1])
+        sources, targets = sources[first], targets[first]
+        new = ~graph.has_edges(sources, targets)
+        return sources[new], targets[new]
+
+    @staticmethod
+    def random_non_edge_arrays(graph, no_of_edges, rng):
+        """
+        Vectorized version of EdgeSampler.random_non_edges for a CompactGraph: draw exactly no_of_edges distinct
+        node pairs that are not edges yet, without replacement. Pairs are drawn in batches and the edges,
+        self-loops and repeated pairs are rejected, so the cost is O(no_of_edges) while the graph stays sparse.
+        :return: (sources, targets) arrays of the drawn pairs (not added to the graph)
+        :raise ValueError: if the graph has fewer unconnected node pairs
+        """
+        no_of_nodes = graph.number_of_nodes()
+        available = no_of_nodes * (no_of_nodes - 1) // 2 - graph.number_of_edges()
+        if no_of_edges > available:
+            raise ValueError("Cannot draw %d new edges, only %d node pairs are unconnected." % (no_of_edges, available))
+        sources, targets = np.empty(0, np.int64), np.empty(0, np.int64)
+        while len(sources) < no_of_edges:
+            size = 2 * (no_of_edges - len(sources)) + 16
+            new_sources = GraphParameters.random_integers(rng, 0, no_of_nodes - 1, size)
+            new_targets = GraphParameters.random_integers(rng, 0, no_of_nodes - 2, size)
+            new_targets += new_targets >= new_sources  # skip the node itself
+            new = ~graph.has_edges(new_sources, new_targets)
+            sources = np.concatenate((sources, new_sources[new]))
+            targets = np.concatenate((targets, new_targets[new]))
+            # keep the first draw of each pair (the pairs kept so far come first)
+            first = np.sort(np.unique(CompactGraph.edge_keys(sources, targets), return_index=True)[1])
+            sources, targets = sources[first][:no_of_edges], targets[first][:no_of_edges]
+        return sources, targets
+
+    @staticmethod
+    def cross_component_edge_arrays(labels, rng):
+        """
+        Vectorized version of add_cross_component_edge for all components at once: a random member of each
+        component is chosen, then the components are joined by a random recursive tree, so exactly
+        (number of components - 1) edges connect the graph.
+        :param labels: component label of each node (see CompactGraph.component_labels)
+        :return: (sources, targets) arrays of the new edges
+        """
+        permutation = rng.permutation(len(labels))
+        roots, first = np.unique(labels[permutation], return_index=True)
+        members = permutation[first][rng.permutation(len(roots))]
+        parents = (rng.uniform(size=len(members) - 1) * np.arange(1, len(members))).astype(np.int64)
+        return members[1:], members[parents]
+
+    def has_edge_target(self):
+        """
+        :return: True if the graphs are generated with a target number of edges (see the constructor)
+        """
+        return self.no_of_edges is not None or self.average_degree is not None or self.probability_edge_creation > 0
+
+    def target_no_of_edges(self, no_of_nodes):
+        """
+        :param no_of_nodes: number of nodes of the graph
+        :return: target number of edges of a graph with the given number of nodes (None without a target)
+        :raise ValueError: if the target is more than the number of node pairs
+        """
+        pairs = no_of_nodes * (no_of_nodes - 1) // 2
+        if self.no_of_edges is not None:
+            target = self.no_of_edges
+        elif self.average_degree is not None:
+            target = int(round(self.average_degree * no_of_nodes / 2.0))
+        elif self.probability_edge_creation > 0:
+            target = int(round(self.probability_edge_creation * pairs))
+        else:
+            return None
+        if target > pairs:
+            raise ValueError("Cannot generate a graph of %d nodes with %d edges (at most %d)." % (
+                no_of_nodes, target, pairs))
+        return target
+
+    def has_exact_edge_target(self):
+        """
+        :return: True if the graphs must have exactly the target number of edges (no_of_edges or average_degree),
+                 False without a target or for a target derived from probability_edge_creation (only a minimum)
+        """
+        return self.no_of_edges is not None or self.average_degree is not None
+
+    def missing_no_of_edges(self, graph):
+        """
+        :param graph: connected graph (networkx graph, GraphVariant or CompactGraph)
+        :return: number of edges to be added to the graph to hit the target (see target_no_of_edges), 0 if a
+                 probability_edge_creation target is below the edges of the graph
+        :raise ValueError: if the graph already has more edges than an exact target (see has_exact_edge_target)
+        """
+        target = self.target_no_of_edges(graph.number_of_nodes())
+        if graph.number_of_edges() > target:
+            if not self.has_exact_edge_target():
+                return 0
+            raise ValueError("Cannot generate a graph of %d nodes with %d edges, it has %d edges once connected." % (
+                graph.number_of_nodes(), target, graph.number_of_edges()))
+        return target - graph.number_of_edges()
+
+    def check_edge_target(self):
+        """
+        Check that an exact edge target (see has_exact_edge_target) can be hit by every graph, whatever the number
+        of nodes added to the common graph, so an impossible target is reported before any graph is generated.
+        A graph has the edges of the common graph plus (number of components - 1) edges once connected.
+        :return: None
+        :raise ValueError: if the target is more than the number of node pairs, or fewer than the edges of a graph
+                           once connected, for some number of nodes
+        """
+        if not self.common_graph or not self.has_exact_edge_target():
+            return
+        if isinstance(self.common_graph, CompactGraph):
+            no_of_components = self.common_graph.number_of_components()
+        else:
+            no_of_components = nx.number_connected_components(self.common_graph)
+        max_no_of_nodes_to_add = max(0, self.max_number_of_possible_nodes_to_add)
+        for no_of_nodes_to_add in range(1 if max_no_of_nodes_to_add > 0 else 0, max_no_of_nodes_to_add + 1):
+            no_of_nodes = self.common_graph_no_of_nodes + no_of_nodes_to_add
+            target = self.target_no_of_edges(no_of_nodes)
+            no_of_edges = self.common_graph.number_of_edges() + no_of_components + no_of_nodes_to_add - 1
+            if no_of_edges > target:
+                raise ValueError("Cannot generate a graph of %d nodes with %d edges, it has %d edges once "
+                                 "connected." % (no_of_nodes, target, no_of_edges))
+
+    @staticmethod
+    def density(graph):
+        """
+        :param graph: networkx graph, GraphVariant or CompactGraph
+        :return: density of the graph (number of edges / number of node pairs)
+        """
+        no_of_nodes = graph.number_of_nodes()
+        if no_of_nodes < 2:
+            return 0.0
+        return 2.0 * graph.number_of_edges() / (no_of_nodes * (no_of_nodes - 1))
+
+    def number_of_nodes_to_add(self):
+        """
+        :return: randomly decided number of new nodes to be added to the common graph
+        """
+        number_of_possible_nodes_to_add = self.rng.randint(0,
+                                                           self.max_number_of_possible_nodes_to_add)  # randomly decide the number of new nodes to be added to current common graph
+
+        while self.max_number_of_possible_nodes_to_add > 0 and number_of_possible_nodes_to_add == 0:  # try best to add aleast 1 node, if possible
+            number_of_possible_nodes_to_add = self.rng.randint(0, self.max_number_of_possible_nodes_to_add)
+        return number_of_possible_nodes_to_add
+
+    def get_common_networkx_graph(self):
+        """
+        :return: the common graph as a networkx graph (a CompactGraph is converted once).
+        """
+        if not isinstance(self.common_graph, CompactGraph):
+            return self.common_graph
+        if self.common_networkx_graph is None:
+            self.common_networkx_graph = self.common_graph.to_networkx()
+        return self.common_networkx_graph
+
+    def get_common_compact_graph(self):
+        """
+        :return: the common graph as a CompactGraph (a networkx graph is converted once).
+        """
+        if isinstance(self.common_graph, CompactGraph):
+            return self.common_graph
+        if self.common_compact_graph is None:
+            self.common_compact_graph = CompactGraph.from_networkx(self.common_graph)
+        return self.common_compact_graph
 
-    def add_graph_attributes(self):
+    def add_graph_attributes(self, design_index=None, series=None):
         # add graph specific attributes
-        self.current_graph.graph['designName'] = GraphParameters.get_design_name()
-        self.current_graph.graph['serie'] = GraphParameters.get_serie()
-        self.current_graph.graph['target_market'] = GraphParameters.get_target_market()
-        self.current_graph.graph['drive_wheels'] = GraphParameters.get_drive_wheels()
-        self.current_graph.graph['battery_type'] = GraphParameters.get_battery_type()
-        self.current_graph.graph['price'] = GraphParameters.get_price()
-        self.current_graph.graph['horsepower'] = GraphParameters.get_horse_power()
-        self.current_graph.graph['mpg'] = GraphParameters.get_mpg()
-        self.current_graph.graph['cylinder'] = GraphParameters.get_cylinder()
-        self.current_graph.graph['engine_size'] = GraphParameters.get_engine_size()
-        self.current_graph.graph['controller'] = GraphParameters.get_controller()
-        self.current_graph.graph['isDiesel'] = GraphParameters.get_is_diesel()
-        self.current_graph.graph['hasTurbo'] = GraphParameters.get_has_turbo()
-        self.current_graph.graph['isPlugin'] = GraphParameters.get_is_plugin()
+        attributes = GraphParameters.get_graph_attributes(1, GraphParameters.numpy_rng(self.rng), design_index,
+                                                          series)[0]
+        for (name, value) in zip(attributes.dtype.names, attributes.item()):
+            self.current_graph.graph[name] = value
+
+    def add_cross_component_edge(self, connectivity):
+        """
+        adds a single random edge between two different components of the current graph.
+        :param connectivity: ConnectivityTracker of the current graph (updated in place)
+        :return: list with the added edge (empty if the graph is already connected)
+        """
+        pair = connectivity.random_cross_component_pair(self.rng)
+        if pair is None:
+            return []
+        self.current_graph.add_edge(*pair)
+        self.get_edge_sampler().add_edge(*pair)
+        connectivity.add_edge(*pair)
+        return [pair]
 
     def add_random_edge(self, probability_of_new_connection=0.1):
         """
         randomly adds edges between nodes with no existing edges.
         based on: https://stackoverflow.com/questions/42591549/add-and-delete-a-random-edge-in-networkx
+        Each node gets a new edge with the given probability; the selected nodes are reached with geometric
+        skips and the other end point is drawn from the node's non-neighbours by the indexed edge sampler,
+        so a round costs O(number of selected nodes) instead of O(V^2).
         :param probability_of_new_connection:
-        :return: None
+        :return: list of added edges
         """
         if self.current_graph:
+            sampler = self.get_edge_sampler()
             new_edges = []
-            for node in self.current_graph.nodes():
-                # find the other nodes this one is connected to
-                connected = [to for (fr, to) in self.current_graph.edges(node)]
-                # and find the remainder of nodes, which are candidates for new edges
-                unconnected = [n for n in self.current_graph.nodes() if not n in connected]
-
-                # probabilistically add a random edge
-                if len(unconnected):  # only try if new edge is possible
-                    if random() < probability_of_new_connection:
-                        new = choice(unconnected)
-                        self.current_graph.add_edge(node, new)
-                        new_edges.append((node, new))
-                        # book-keeping, in case both add and remove done in same cycle
-                        unconnected.remove(new)
-                        connected.append(new)
+            for node in sampler.random_nodes(probability_of_new_connection):  # probabilistically add a random edge
+                new = sampler.random_non_neighbour(node)
+                if new is not None:  # only if new edge is possible
+                    self.current_graph.add_edge(node, new)
+                    sampler.add_edge(node, new)
+                    new_edges.append((node, new))
             return new_edges
 
+    def add_random_edges(self, number_of_edges):
+        """
+        adds exactly number_of_edges new random edges between unconnected node pairs (drawn without replacement).
+        Cost is proportional to the number of edges added, not to the square of the number of nodes.
+        :param number_of_edges: number of edges to be added
+        :return: list of added edges
+        """
+        if self.current_graph:
+            sampler = self.get_edge_sampler()
+            new_edges = sampler.random_non_edges(number_of_edges)
+            for (fr, to) in new_edges:
+                self.current_graph.add_edge(fr, to)
+                sampler.add_edge(fr, to)
+            return new_edges
+
+    def get_edge_sampler(self):
+        """
+        :return: the edge sampler indexing the current graph (created on first use).
+        """
+        if self.edge_sampler is None:
+            self.edge_sampler = EdgeSampler(self.get_networkx_graph(), self.rng)
+        return self.edge_sampler
+
+    def get_networkx_graph(self):
+        """
+        :return: the current graph as a networkx graph (a GraphVariant or CompactGraph is converted).
+        """
+        if isinstance(self.current_graph, (GraphVariant, CompactGraph)):
+            return self.current_graph.to_networkx()
+        return self.current_graph
+
     def list_nodes(self):
         """
         list all the node and node types of the current graph for debugging purpose.
         :return: None.
         """
-        for node in self.current_graph.nodes():
-            print "node %d - type = %s" % (node, self.current_graph.node[node]["type"])
+        for (node, data) in self.current_graph.nodes(data=True):
+            print "node %d - type = %s" % (node, data["type"])
 
-    def save_graph(self, file_name):
+    def save_graph(self, file_name, compression=None):
         """
         :param file_name: Save the current graph to a graphml file - file_name is the path to the file.
+        :param compression: None, 'gz' or 'zst' (see GraphMLWriter.open_file), optional
+        :return: None. Errors while writing (e.g. IOError) are raised to the caller.
+        """
+        if self.current_graph:
+            GraphGenerator.write_graphml(self.current_graph, file_name, compression, self.metrics)
+        else:
+            raise Exception("No graph to save.")
+
+    def save_post_processed_graph(self, file_name, compression=None):
+        """
+        Save the current graph directly in the post-processed XML format (see GraphMLWriter), in a single pass.
+        :param file_name: path to the .xml file.
+        :param compression: None, 'gz' or 'zst' (see GraphMLWriter.open_file), optional
         :return: None.
         """
         if self.current_graph:
-            try:
-                nx.write_graphml(self.current_graph, file_name, prettyprint=True)
-            except IOError:
-                print 'Unable to save the file.'
+            GraphGenerator.write_post_processed_graph(self.current_graph, file_name, compression, self.metrics)
         else:
             raise Exception("No graph to save.")
 
+    @staticmethod
+    def write_graphml(graph, file_name, compression=None, metrics=NO_METRICS):
+        """
+        Save a graph to a networkx graphml file (errors are raised to the caller, see save_graph).
+        :param graph: networkx graph, GraphVariant or CompactGraph
+        :param file_name: path to the file
+        :param compression: None, 'gz' or 'zst' (see GraphMLWriter.open_file), optional
+        :param metrics: GenerationMetrics, optional
+        :return: None
+        """
+        start = metrics.start()
+        if isinstance(graph, (GraphVariant, CompactGraph)):
+            graph = graph.to_networkx()
+        with GraphMLWriter.open_file(file_name, compression) as stream:
+            nx.write_graphml(graph, stream, prettyprint=True)
+        metrics.stop('save_graph', start)
+        if metrics.enabled:
+            metrics.count('bytes_written', os.path.getsize(file_name))
+
+    @staticmethod
+    def write_post_processed_graph(graph, file_name, compression=None, metrics=NO_METRICS):
+        """
+        Save a graph in the post-processed XML format (see save_post_processed_graph).
+        :param graph: networkx graph, GraphVariant or CompactGraph
+        :param file_name: path to the .xml file
+        :param compression: None, 'gz' or 'zst' (see GraphMLWriter.open_file), optional
+        :param metrics: GenerationMetrics, optional
+        :return: None
+        """
+        start = metrics.start()
+        GraphMLWriter.save_graph(graph, file_name, compression=compression)
+        metrics.stop('save_post_processed_graph', start)
+        if metrics.enabled:
+            metrics.count('bytes_written', os.path.getsize(file_name))
+
     def show(self, labels=True):
         """
-        Display a generated connected graph (using matplotlib library).
+        Display a generated connected graph (using matplotlib library, see GraphVisualiser).
 
         Paramters
         ----------
@@ -182,15 +560,7 @@ class GraphGenerator:
         >>> G.show()
         """
         if self.current_graph:
-            if not labels:
-                nx.draw_networkx(self.current_graph)
-                plt.show()
-            else:
-                pos = nx.spring_layout(self.current_graph)
-                nx.draw(self.current_graph, pos)
-                node_labels = nx.get_node_attributes(self.current_graph, 'type')
-                nx.draw_networkx_labels(self.current_graph, pos, labels=node_labels)
-                plt.show()
-
+            from GraphVisualiser import GraphVisualiser  # loads matplotlib, only when displaying
+            GraphVisualiser.show_graph(self.get_networkx_graph(), labels)
         else:
             raise Exception('No graph to visualise!')
@@ -0,0 +1,106 @@
+import hashlib
+import os
+
+
+class GraphHashIndex:
+    """
+    Index of canonical graph hashes, used to keep the graphs of a set unique (see
+    MainGraphGenerator.generate_graph_set(unique=True)).
+    The hash of a graph is a Weisfeiler-Lehman hash over its structure and node types: isomorphic graphs with the
+    same node types always get the same hash (whatever their node numbering), so identical and isomorphic graphs
+    are detected. The WL test can give the same hash to a few non-isomorphic graphs (e.g. some regular graphs);
+    such graphs are treated as duplicates too.
+    The index can be saved to a file (one "<hash>\t<label>" line per graph) and loaded again, to reject
+    graphs of earlier sets.
+
+    Examples
+    --------
+    >>> index = GraphHashIndex()
+    >>> index.add(GraphHashIndex.graph_hash(graph), "set1/1st_example_graph.graphml")
+    True
+    >>> index.save("./hashes.tsv")
+    """
+
+    ITERATIONS = 3
+
+    def __init__(self):
+        self.labels = {}  # hash -> label of the graph (e.g. its file path)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, graph_hash):
+        return graph_hash in self.labels
+
+    @staticmethod
+    def graph_hash(graph, iterations=ITERATIONS):
+        """
+        :param graph: networkx graph, GraphVariant or CompactGraph (nodes with a 'type' attribute)
+        :param iterations: number of WL refinement rounds (the neighbourhood radius taken into account)
+        :return: hex digest of the Weisfeiler-Lehman hash of the graph
+        """
+        positions = {}
+        labels = []
+        for (node, data) in graph.nodes(data=True):
+            positions[node] = len(labels)
+            labels.append(str(data.get('type', '')))
+        neighbours = [[] for label in labels]
+        for (fr, to) in graph.edges():
+            neighbours[positions[fr]].append(positions[to])
+            neighbours[positions[to]].append(positions[fr])
+
+        counts = {}
+        for round_number in range(iterations + 1):
+            for label in labels:
+                key = "%d:%s" % (round_number, label)
+                counts[key] = counts.get(key, 0) + 1
+            if round_number < iterations:
+                # new label: own label and the sorted labels of the neighbours, compressed to a fixed size
+                labels = [hashlib.sha1(label + "|" + ",".join(sorted(labels[i] for i in node_neighbours))).hexdigest()
+                          [:16] for (label, node_neighbours) in zip(labels, neighbours)]
+        digest = hashlib.sha256("%d|%d" % (len(labels), graph.number_of_edges()))
+        for key in sorted(counts):
+            digest.update(";%s=%d" % (key, counts[key]))
+        return digest.hexdigest()
+
+    def add(self, graph_hash, label):
+        """
+        :param graph_hash: hash of a graph (see graph_hash)
+        :param label: label of the graph (e.g. its file path)
+        :return: True if the graph is new (or was indexed with the same label before), False for a duplicate
+        """
+        existing = self.labels.get(graph_hash)
+        if existing is not None and existing != label:
+            return False
+        self.labels[graph_hash] = label
+        return True
+
+    def duplicate_of(self, graph_hash):
+        """
+        :return: label of the indexed graph with the given hash, or None
+        """
+        return self.labels.get(graph_hash)
+
+    def load(self, file_path):
+        """
+        Add the hashes of an index file (see save) to the index.
+        :param file_path: path to the index file
+        :return: None
+        """
+        with open(file_path) as stream:
+            for line in stream:
+                if line.strip():
+                    graph_hash, label = line.rstrip("\n").split("\t", 1)
+                    self.labels.setdefault(graph_hash, label)
+
+    def save(self, file_path):
+        """
+        Write the index to a file (replaced atomically, so an interrupted save keeps the previous index).
+        :param file_path: path to the index file
+        :return: None
+        """
+        temporary_path = file_path + ".tmp"
+        with open(temporary_path, "w") as stream:
+            for graph_hash in sorted(self.labels):
+                stream.write("%s\t%s\n" % (graph_hash, self.labels[graph_hash]))
+        os.rename(temporary_path, file_path)
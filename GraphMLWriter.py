@@ -0,0 +1,225 @@
+import codecs
+import gzip
+from contextlib import closing, contextmanager
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+try:
+    import zstandard  # optional, only needed for zstd compressed output
+except ImportError:
+    zstandard = None
+
+from GraphUtils import GraphUtils
+
+
+class GraphMLWriter:
+    """
+    Single-pass writer for the final (post-processed) XML form of generated graphs.
+    The output is equivalent to the document GraphUtils produces from a networkx .graphml file (same nodes, edges
+    and attributes, but the order of the keys and edges may differ):
+    1) keys are named after their attributes (graph name attribute is dropped)
+    2) graph id is derived from the designName (e.g. 1st_example_graph)
+    3) node ids start from 1 and edges get sequential ids (source/target shifted accordingly)
+    4) price is formatted with two decimal places, mpg and horsepower with one
+    so neither the intermediate .graphml file nor the DOM post-processing is needed.
+    The low level write_* methods are also used to stream documents that are not held as networkx graphs.
+    """
+
+    XML_TYPES = [(bool, "boolean"), (int, "int"), (float, "double")]  # anything else is written as string
+    SCHEMA_LOCATION = "http://graphml.graphdrawing.org/xmlns http://graphml.graphdrawing.org/xmlns/1.0/graphml.xsd"
+    COMPRESSION_SUFFIXES = {None: "", 'gz': ".gz", 'zst': ".zst"}  # file name suffix of each compression
+
+    def __init__(self, stream):
+        """
+        :param stream: writable text stream (e.g. opened with codecs.open(..., 'w', 'utf8'))
+        """
+        self.stream = stream
+        self.edge_id = 0
+
+    @staticmethod
+    def quote(value):
+        return escape(value, {'"': "&quot;", "\n": "&#10;"})
+
+    @staticmethod
+    def xml_type(value):
+        for (python_type, xml_type) in GraphMLWriter.XML_TYPES:
+            if isinstance(value, python_type):
+                return xml_type
+        return "string"
+
+    @staticmethod
+    def make_text(attribute_name, value):
+        """
+        :return: text of a data element (number formats applied)
+        """
+        if attribute_name in GraphUtils.VALUE_FORMATS:
+            return GraphUtils.VALUE_FORMATS[attribute_name] % value
+        if isinstance(value, basestring):
+            return value
+        return str(value)
+
+    def write_header(self):
+        self.stream.write(u"<?xml version='1.0' encoding='utf8'?>\n"
+                          u'<graphml xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" '
+                          u'xlmns="http://graphml.graphdrawing.org/xmlns" xsi:schemaLocation="%s">\n'
+                          % GraphMLWriter.SCHEMA_LOCATION)
+
+    def write_key(self, key_id, for_element, attribute_name, attribute_type):
+        self.stream.write(u'  <key attr.name="%s" attr.type="%s" for="%s" id="%s" />\n' % (
+            self.quote(attribute_name), attribute_type, for_element, self.quote(key_id)))
+
+    def write_data(self, data, indent):
+        """
+        :param data: list of (key id, text) tuples
+        :param indent: indentation of the data elements
+        """
+        for (key_id, text) in data:
+            self.stream.write(u'%s<data key="%s">%s</data>\n' % (indent, self.quote(key_id), escape(text)))
+
+    def start_graph(self, graph_id, data=()):
+        self.stream.write(u'  <graph edgedefault="undirected" id="%s">\n' % self.quote(graph_id))
+        self.write_data(data, u"    ")
+
+    def write_node(self, node_id, data=()):
+        """
+        :param node_id: node id (numeric string, written as is)
+        :param data: list of (key id, text) tuples
+        """
+        if data:
+            self.stream.write(u'    <node id="%s">\n' % node_id)
+            self.write_data(data, u"      ")
+            self.stream.write(u"    </node>\n")
+        else:
+            self.stream.write(u'    <node id="%s" />\n' % node_id)
+
+    def write_edge(self, source, target, data=()):
+        """
+        Write an edge with the next sequential edge id.
+        :param source: source node id (numeric string, written as is)
+        :param target: target node id (numeric string, written as is)
+        :param data: list of (key id, text) tuples
+        """
+        self.edge_id += 1
+        if data:
+            self.stream.write(u'    <edge id="%d" source="%s" target="%s">\n' % (self.edge_id, source, target))
+            self.write_data(data, u"      ")
+            self.stream.write(u"    </edge>\n")
+        else:
+            self.stream.write(u'    <edge id="%d" source="%s" target="%s" />\n' % (self.edge_id, source, target))
+
+    def end_graph(self):
+        self.stream.write(u"  </graph>\n</graphml>")
+
+    @staticmethod
+    def collect_keys(items, known_attributes):
+        """
+        :param items: iterable of attribute dictionaries (e.g. node data)
+        :param known_attributes: attributes listed first, in this order
+        :return: list of (attribute name, xml type) tuples
+        """
+        types = {}
+        for attributes in items:
+            for (name, value) in attributes.items():
+                if name not in types:
+                    types[name] = GraphMLWriter.xml_type(value)
+        names = [name for name in known_attributes if name in types]
+        names.extend(sorted(name for name in types if name not in known_attributes))
+        return [(name, types[name]) for name in names]
+
+    def write_graph(self, graph, graph_id=None):
+        """
+        Write a whole networkx graph (nodes must be integers numbered from 0).
+        :param graph: networkx graph
+        :param graph_id: graph id, optional. By default derived from the designName graph attribute.
+        :return: None
+        """
+        graph_attributes = dict((name, value) for (name, value) in graph.graph.items() if name != 'name')
+        graph_keys = GraphMLWriter.collect_keys([graph_attributes], GraphUtils.GRAPH_ATTRIBUTES)
+        node_keys = GraphMLWriter.collect_keys((data for (node, data) in graph.nodes(data=True)),
+                                               GraphUtils.NODE_ATTRIBUTES)
+        edge_keys = GraphMLWriter.collect_keys((data for (fr, to, data) in graph.edges(data=True)), [])
+
+        # known attributes are keyed by their names, any other attribute gets a generated key id
+        key_ids = {}
+        for (element, keys, known_attributes) in (('node', node_keys, GraphUtils.NODE_ATTRIBUTES),
+                                                  ('graph', graph_keys, GraphUtils.GRAPH_ATTRIBUTES),
+                                                  ('edge', edge_keys, [])):
+            for (name, attribute_type) in keys:
+                key_id = name if name in known_attributes else "d%d" % len(key_ids)
+                key_ids[(element, name)] = key_id
+
+        self.write_header()
+        for (element, keys) in (('node', node_keys), ('graph', graph_keys), ('edge', edge_keys)):
+            for (name, attribute_type) in keys:
+                self.write_key(key_ids[(element, name)], element, name, attribute_type)
+
+        if graph_id is None:
+            graph_id = "temp"
+            if 'designName' in graph_attributes:
+                graph_id = GraphUtils.graph_id_from_design_name(graph_attributes['designName'])
+        self.start_graph(graph_id, [(key_ids[('graph', name)], self.make_text(name, graph_attributes[name]))
+                                    for (name, attribute_type) in graph_keys])
+        for (node, data) in graph.nodes(data=True):
+            self.write_node(str(int(node) + 1), [(key_ids[('node', name)], self.make_text(name, data[name]))
+                                                 for (name, attribute_type) in node_keys if name in data])
+        for (fr, to, data) in graph.edges(data=True):
+            self.write_edge(str(int(fr) + 1), str(int(to) + 1),
+                            [(key_ids[('edge', name)], self.make_text(name, data[name]))
+                             for (name, attribute_type) in edge_keys if name in data])
+        self.end_graph()
+
+    @staticmethod
+    def check_compression(compression):
+        """
+        :param compression: None, 'gz' or 'zst'
+        :return: None, raises ValueError for unknown compressions and ImportError if zstandard is missing
+        """
+        if compression not in GraphMLWriter.COMPRESSION_SUFFIXES:
+            raise ValueError("Unknown compression: %s" % compression)
+        if compression == 'zst' and zstandard is None:
+            raise ImportError("zstd compressed output requires the zstandard package (pip install zstandard).")
+
+    @staticmethod
+    @contextmanager
+    def open_file(file_name, compression=None):
+        """
+        Open a binary output file, optionally compressed.
+        :param file_name: path of the file
+        :param compression: None, 'gz' (gzip) or 'zst' (zstd, requires the zstandard package)
+        :return: context manager giving the writable binary stream
+        """
+        GraphMLWriter.check_compression(compression)
+        if compression is None:
+            with open(file_name, 'wb') as stream:
+                yield stream
+        elif compression == 'gz':
+            # no file name and a fixed time in the gzip header, so the same graph always gives the same bytes
+            with open(file_name, 'wb') as raw_stream:
+                with closing(gzip.GzipFile(filename='', mode='wb', fileobj=raw_stream, mtime=0)) as stream:
+                    yield stream
+        else:
+            with open(file_name, 'wb') as raw_stream:
+                with zstandard.ZstdCompressor().stream_writer(raw_stream) as stream:
+                    yield stream
+
+    @staticmethod
+    def save_graph(graph, file_name, graph_id=None, compression=None):
+        """
+        Write the post-processed XML of a networkx graph to a file in one pass.
+        :param graph: networkx graph
+        :param file_name: path of the .xml file
+        :param graph_id: graph id, optional (derived from the designName by default)
+        :param compression: None, 'gz' or 'zst', optional (see open_file)
+        :return: None
+        """
+        with GraphMLWriter.open_file(file_name, compression) as stream:
+            GraphMLWriter(codecs.getwriter('utf8')(stream)).write_graph(graph, graph_id)
+
+    @staticmethod
+    def to_string(graph, graph_id=None):
+        """
+        :return: the post-processed XML of a networkx graph, utf8 encoded
+        """
+        stream = BytesIO()
+        GraphMLWriter(codecs.getwriter('utf8')(stream)).write_graph(graph, graph_id)
+        return stream.getvalue()
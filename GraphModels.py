@@ -0,0 +1,257 @@
+from math import ceil, log, pi, sqrt
+import random
+
+import networkx as nx
+import numpy as np
+
+from CompactGraph import CompactGraph
+
+
+class GraphModels:
+    """
+    Registry of the random graph models the common graph can be generated with (see
+    CommonGraphGenerator(model=...)):
+    - gnp: Erdos-Renyi G(n,p) graph
+    - barabasi_albert: scale-free graph grown by preferential attachment
+    - watts_strogatz: small-world graph (ring lattice with randomly rewired edges)
+    - sbm: stochastic block model (dense blocks, sparse edges between blocks)
+    - geometric: random geometric graph (nodes in the unit square, joined when close)
+    Every model is parameterized by the target average node degree and draws its edges in O(V+E) (expected)
+    time. The shared core (connected_edges) then joins the components of the drawn graph with a random tree
+    over the components, so each model directly yields a connected graph without regenerating.
+
+    Examples
+    --------
+    >>> edges = GraphModels.connected_edges('barabasi_albert', 1000, random.Random(1), average_degree=6)
+    >>> graph = GraphModels.connected_graph('watts_strogatz', 1000, random.Random(1), average_degree=6,
+    ...                                     rewiring=0.2)
+    """
+
+    DEFAULT_AVERAGE_DEGREE = 4.0
+    # model name -> (edge drawing method, parameters besides average_degree)
+    MODELS = {'gnp': ('gnp_model_edges', []),
+              'barabasi_albert': ('barabasi_albert_edges', []),
+              'watts_strogatz': ('watts_strogatz_edges', ['rewiring']),
+              'sbm': ('sbm_edges', ['blocks', 'mixing']),
+              'geometric': ('geometric_edges', [])}
+
+    @staticmethod
+    def check_model(model, parameters=()):
+        """
+        :param model: model name (see MODELS)
+        :param parameters: names of the model parameters, optional
+        :return: None
+        :raise ValueError: for an unknown model or parameter
+        """
+        if model not in GraphModels.MODELS:
+            raise ValueError("Unknown graph model: %s (use one of %s)" % (model, ", ".join(sorted(GraphModels.MODELS))))
+        unknown = set(parameters) - set(GraphModels.MODELS[model][1]) - set(['average_degree'])
+        if unknown:
+            raise ValueError("Unknown parameters of the %s model: %s" % (model, ", ".join(sorted(unknown))))
+
+    @staticmethod
+    def connected_edges(model, no_of_nodes, rng=random, average_degree=2.0, **parameters):
+        """
+        Draw the edges of a connected graph with the given model.
+        :param model: model name (see MODELS)
+        :param no_of_nodes: number of nodes (numbered from 0)
+        :param rng: random number generator (random.Random instance), optional
+        :param average_degree: target average node degree, optional
+        :param parameters: parameters of the model (see the edge drawing methods)
+        :return: list of (node, node) edges, without duplicates
+        """
+        GraphModels.check_model(model, parameters)
+        method = getattr(GraphModels, GraphModels.MODELS[model][0])
+        edges = list(method(no_of_nodes, max(0.0, float(average_degree)), rng, **parameters))
+        edges.extend(GraphModels.connecting_edges(no_of_nodes, edges, rng))
+        return edges
+
+    @staticmethod
+    def connected_graph(model, no_of_nodes, rng=random, average_degree=2.0, **parameters):
+        """
+        Same as connected_edges, but returns a networkx graph.
+        """
+        graph = nx.Graph()
+        graph.name = "%s(%s,%s)" % (model, no_of_nodes, average_degree)
+        graph.add_nodes_from(range(no_of_nodes))
+        graph.add_edges_from(GraphModels.connected_edges(model, no_of_nodes, rng, average_degree, **parameters))
+        return graph
+
+    @staticmethod
+    def connecting_edges(no_of_nodes, edges, rng=random):
+        """
+        Shared connected-graph core: join the components of a graph with a random recursive tree over the
+        components (each component is attached to a uniformly chosen earlier one, through uniformly chosen
+        members). The components are labelled with numpy (see CompactGraph.connect_labels), O(V+E).
+        :return: list of the added edges (one less than the number of components)
+        """
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        labels = np.arange(no_of_nodes, dtype=np.int64)
+        CompactGraph.connect_labels(labels, edges[:, 0], edges[:, 1])
+        members = np.argsort(labels, kind='mergesort')  # the nodes grouped by component
+        roots, starts, sizes = np.unique(labels[members], return_index=True, return_counts=True)
+        members, starts, sizes = members.tolist(), starts.tolist(), sizes.tolist()
+        components = list(range(len(roots)))
+        rng.shuffle(components)
+
+        def random_member(component):
+            return members[starts[component] + rng.randint(0, sizes[component] - 1)]
+
+        return [(random_member(components[i]), random_member(components[rng.randint(0, i - 1)]))
+                for i in range(1, len(components))]
+
+    @staticmethod
+    def bernoulli_indices(count, probability, rng=random):
+        """
+        Yield each index in the range of 0 to count - 1 with the given probability, in increasing order, in
+        O(number of selected indices) with geometric skips.
+        """
+        if probability >= 1:
+            for index in range(count):
+                yield index
+        elif probability > 0:
+            log_q = log(1.0 - probability)
+            index = -1
+            while True:
+                index += 1 + int(log(1.0 - rng.random()) / log_q)
+                if index >= count:
+                    return
+                yield index
+
+    @staticmethod
+    def gnp_edges(no_of_nodes, probability_for_edge_creation, rng=random):
+        """
+        Yield the edges of a G(n,p) graph in O(V+E): the selected node pairs are reached with geometric
+        skips, as in networkx fast_gnp_random_graph, so pairs that are not selected are never visited.
+        """
+        if probability_for_edge_creation >= 1:
+            for v in range(no_of_nodes):
+                for w in range(v):
+                    yield (v, w)
+        elif probability_for_edge_creation > 0:
+            log_q = log(1.0 - probability_for_edge_creation)
+            v = 1
+            w = -1
+            while v < no_of_nodes:
+                w += 1 + int(log(1.0 - rng.random()) / log_q)
+                while w >= v and v < no_of_nodes:
+                    w -= v
+                    v += 1
+                if v < no_of_nodes:
+                    yield (v, w)
+
+    @staticmethod
+    def gnp_model_edges(no_of_nodes, average_degree, rng):
+        """
+        G(n,p) with p = average_degree / (no_of_nodes - 1).
+        """
+        return GraphModels.gnp_edges(no_of_nodes, average_degree / max(no_of_nodes - 1, 1), rng)
+
+    @staticmethod
+    def barabasi_albert_edges(no_of_nodes, average_degree, rng):
+        """
+        Barabasi-Albert preferential attachment: each new node is joined to m = average_degree / 2 distinct
+        existing nodes chosen with probability proportional to their degree (drawn from the list of edge end
+        points). O(V * m) = O(E).
+        """
+        m = min(max(1, int(round(average_degree / 2.0))), max(no_of_nodes - 1, 1))
+        end_points = []
+        targets = range(m)
+        for source in range(m, no_of_nodes):
+            for target in targets:
+                yield (source, target)
+            end_points.extend(targets)
+            end_points.extend([source] * m)
+            chosen = set()
+            while len(chosen) < m:
+                chosen.add(end_points[rng.randint(0, len(end_points) - 1)])
+            targets = list(chosen)
+
+    @staticmethod
+    def watts_strogatz_edges(no_of_nodes, average_degree, rng, rewiring=0.1):
+        """
+        Watts-Strogatz small world: a ring lattice where each node is joined to its k / 2 nearest neighbours on
+        each side (k = average_degree rounded to an even number), then the far end of each lattice edge is moved
+        to a uniformly chosen node with probability rewiring (avoiding self-loops and duplicate edges). O(V * k).
+        """
+        k = min(max(2, 2 * int(round(average_degree / 2.0))), no_of_nodes - 1 - (no_of_nodes - 1) % 2)
+        neighbours = [set() for node in range(no_of_nodes)]
+        for distance in range(1, k // 2 + 1):
+            for node in range(no_of_nodes):
+                neighbours[node].add((node + distance) % no_of_nodes)
+                neighbours[(node + distance) % no_of_nodes].add(node)
+        if no_of_nodes > 2 and rewiring > 0:
+            for distance in range(1, k // 2 + 1):
+                for node in range(no_of_nodes):
+                    far = (node + distance) % no_of_nodes
+                    if far not in neighbours[node] or rng.random() >= rewiring:
+                        continue
+                    if len(neighbours[node]) >= no_of_nodes - 1:
+                        continue  # no free node to rewire to
+                    new = rng.randint(0, no_of_nodes - 1)
+                    while new == node or new in neighbours[node]:
+                        new = rng.randint(0, no_of_nodes - 1)
+                    neighbours[node].discard(far)
+                    neighbours[far].discard(node)
+                    neighbours[node].add(new)
+                    neighbours[new].add(node)
+        for node in range(no_of_nodes):
+            for neighbour in neighbours[node]:
+                if neighbour < node:
+                    yield (node, neighbour)
+
+    @staticmethod
+    def sbm_edges(no_of_nodes, average_degree, rng, blocks=4, mixing=0.1):
+        """
+        Stochastic block model: the nodes are split into blocks of (nearly) equal size, a fraction mixing of the
+        expected edges join different blocks and the rest are inside the blocks. Each block and each pair of
+        blocks is a G(n,p) graph drawn with geometric skips, O(V + E + blocks^2).
+        """
+        blocks = max(1, min(int(blocks), no_of_nodes))
+        bounds = [no_of_nodes * block // blocks for block in range(blocks + 1)]
+        sizes = [bounds[block + 1] - bounds[block] for block in range(blocks)]
+        pairs_inside = sum(size * (size - 1) // 2 for size in sizes)
+        pairs_between = no_of_nodes * (no_of_nodes - 1) // 2 - pairs_inside
+        expected_edges = no_of_nodes * average_degree / 2.0
+        mixing = mixing if pairs_between else 0.0
+        probability_inside = min(1.0, (1 - mixing) * expected_edges / pairs_inside) if pairs_inside else 0.0
+        probability_between = min(1.0, mixing * expected_edges / pairs_between) if pairs_between else 0.0
+        for block in range(blocks):
+            for (v, w) in GraphModels.gnp_edges(sizes[block], probability_inside, rng):
+                yield (bounds[block] + v, bounds[block] + w)
+        for block in range(blocks):
+            for other in range(block + 1, blocks):
+                for index in GraphModels.bernoulli_indices(sizes[block] * sizes[other], probability_between, rng):
+                    yield (bounds[block] + index // sizes[other], bounds[other] + index % sizes[other])
+
+    @staticmethod
+    def geometric_edges(no_of_nodes, average_degree, rng):
+        """
+        Random geometric graph: nodes are placed uniformly in the unit square and joined when closer than the
+        radius giving the target average degree (no_of_nodes * pi * radius^2, ignoring the border). Only nodes
+        in neighbouring grid cells of that size are compared, O(V + E) expected.
+        """
+        if no_of_nodes < 2 or average_degree <= 0:
+            return
+        radius = min(sqrt(average_degree / (pi * (no_of_nodes - 1))), sqrt(2.0))
+        positions = [(rng.random(), rng.random()) for node in range(no_of_nodes)]
+        cells_per_side = max(1, int(ceil(1.0 / radius)))
+        cells = {}
+        for (node, (x, y)) in enumerate(positions):
+            cells.setdefault((min(int(x / radius), cells_per_side - 1), min(int(y / radius), cells_per_side - 1)),
+                             []).append(node)
+        radius_squared = radius * radius
+        for ((cell_x, cell_y), nodes) in cells.items():
+            # each pair of cells is compared once: the cell itself and the four following neighbours
+            for (dx, dy) in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+                others = cells.get((cell_x + dx, cell_y + dy))
+                if not others:
+                    continue
+                for node in nodes:
+                    (x, y) = positions[node]
+                    for other in others:
+                        if (dx, dy) == (0, 0) and other <= node:
+                            continue
+                        (other_x, other_y) = positions[other]
+                        if (x - other_x) ** 2 + (y - other_y) ** 2 < radius_squared:
+                            yield (node, other)
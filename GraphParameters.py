@@ -1,4 +1,6 @@
-from random import randint, choice, uniform, getrandbits, random
+import random
+
+import numpy as np
 
 
 class GraphParameters:
@@ -17,97 +19,239 @@ class GraphParameters:
     ##isDiesel: randomly { true | false}
     ##hasTurbo: randomly {true | false }
     ##isPlugIn : randomly { true | false }
+    Besides the get_* methods (one value per call) there is a batch API (get_node_types, get_graph_attributes)
+    that draws the values of many nodes/graphs at once with a numpy random generator.
+    All methods take an optional random number generator (rng, a random.Random instance for the get_* methods,
+    a numpy generator for the batch methods) so runs can be reproduced; by default the random module is used.
     """
 
     NODE_TYPES = ["nodetypeA", "nodetypeB"]
     TARGET_MARKETS = ["Europe", "Asia", "South America"]
     BATTERY_TYPE = ["Li-ion polymer", "Lithium-Ion", "VRLA, NiCd"]
     DRIVE_WHEELS = ["fwd", "4wd", "rwd"]
-    SERIE = set()
-    design_counter = 0
+    ENGINE_SIZES = [round(1.2 + 0.2 * i, 1) for i in range(15)]  # 1.2, 1.4, ..., 4.0
+    # precomputed value tables for the batch methods
+    NODE_TYPE_TABLE = np.asarray(NODE_TYPES, dtype=object)
+    TARGET_MARKET_TABLE = np.asarray(TARGET_MARKETS, dtype=object)
+    BATTERY_TYPE_TABLE = np.asarray(BATTERY_TYPE, dtype=object)
+    DRIVE_WHEEL_TABLE = np.asarray(DRIVE_WHEELS, dtype=object)
+    ENGINE_SIZE_TABLE = np.asarray(ENGINE_SIZES)
+    SERIE_CHARACTERS = np.asarray(list('0123456789ABCDEF-'))
+    # default pool of generated serie values for reuse (bounded, a random entry is evicted once it is full)
+    SERIE = []
+    MAX_SERIE_POOL_SIZE = 1000
+    design_counter = 0  # number of the last design name, when no number is given (see get_design_name)
+    # one row of graph attributes (see get_graph_attributes)
+    GRAPH_ATTRIBUTE_DTYPE = [('designName', object), ('serie', object), ('target_market', object),
+                             ('drive_wheels', object), ('battery_type', object), ('price', float),
+                             ('horsepower', float), ('mpg', float), ('cylinder', int), ('engine_size', float),
+                             ('controller', int), ('isDiesel', bool), ('hasTurbo', bool), ('isPlugin', bool)]
+
+    @staticmethod
+    def numpy_rng(rng=random):
+        """
+        Create a numpy random generator (numpy.random.Generator, or RandomState on numpy versions without it)
+        seeded from the given random number generator, so seeding it also makes the batch methods reproducible.
+        :param rng: random.Random instance, optional (default: random module)
+        :return: numpy random generator
+        """
+        return getattr(np.random, 'default_rng', np.random.RandomState)(rng.getrandbits(32))
 
     @staticmethod
-    def get_node_type():
-        return choice(GraphParameters.NODE_TYPES)
+    def random_integers(rng, low, high, size):
+        """
+        :return: numpy array of random integers in the range of low to high (both inclusive)
+        """
+        if hasattr(rng, 'integers'):
+            return rng.integers(low, high + 1, size)
+        return rng.randint(low, high + 1, size)
+
+    @staticmethod
+    def get_node_types(size, rng=None):
+        """
+        Batch version of get_node_type.
+        :param size: number of node types
+        :param rng: numpy random generator, optional
+        :return: numpy array of node types
+        """
+        return GraphParameters.NODE_TYPE_TABLE[GraphParameters.get_node_type_codes(size, rng)]
+
+    @staticmethod
+    def get_node_type_codes(size, rng=None):
+        """
+        Same as get_node_types, but returns the index of each node type in NODE_TYPES (used by CompactGraph).
+        :param size: number of node types
+        :param rng: numpy random generator, optional
+        :return: numpy int8 array of node type codes
+        """
+        rng = rng if rng is not None else GraphParameters.numpy_rng()
+        return GraphParameters.random_integers(rng, 0, len(GraphParameters.NODE_TYPES) - 1, size).astype(np.int8)
 
     @staticmethod
-    def get_design_name():
+    def get_series(size, rng=None, probability_of_using_same_serie=0.1, pool=None):
+        """
+        Batch version of get_serie.
+        :param size: number of serie values
+        :param rng: numpy random generator, optional
+        :param probability_of_using_same_serie: probability of reusing an existing serie value
+        :param pool: list of reusable serie values, new values are added to it (see add_serie), optional
+                     (default: SERIE)
+        :return: list of serie values
+        """
+        rng = rng if rng is not None else GraphParameters.numpy_rng()
+        reuse = rng.uniform(size=size)
+        picks = rng.uniform(size=size)  # also used to pick the pool entry evicted by a new serie
+        characters = GraphParameters.SERIE_CHARACTERS[
+            GraphParameters.random_integers(rng, 0, len(GraphParameters.SERIE_CHARACTERS) - 1, (size, 8))]
+        suffixes = characters.view(characters.dtype.str[:2] + '8').ravel()  # join the 8 characters of each row
+        pool = pool if pool is not None else GraphParameters.SERIE
+        series = []
+        for i in range(size):
+            if reuse[i] < probability_of_using_same_serie and pool:
+                series.append(pool[int(picks[i] * len(pool))])
+            else:
+                serie = "Alpha-" + str(suffixes[i]).strip("-")
+                GraphParameters.add_serie(serie, picks[i], pool)
+                series.append(serie)
+        return series
+
+    @staticmethod
+    def get_graph_attributes(size, rng=None, first_design_index=None, series=None):
+        """
+        Batch version of the graph attribute methods (get_design_name ... get_is_plugin).
+        Give first_design_index and series to draw the attributes without using the class state (design_counter
+        and SERIE), e.g. from several threads.
+        :param size: number of graphs
+        :param rng: numpy random generator, optional
+        :param first_design_index: number of the design name of the first graph, optional (default: the next
+                                   numbers of get_design_name)
+        :param series: pool of reusable serie values (see get_series), optional
+        :return: numpy structured array with one row of attributes per graph (see GRAPH_ATTRIBUTE_DTYPE)
+        """
+        rng = rng if rng is not None else GraphParameters.numpy_rng()
+        rows = np.empty(size, dtype=GraphParameters.GRAPH_ATTRIBUTE_DTYPE)
+        rows['designName'] = [GraphParameters.get_design_name(
+            None if first_design_index is None else first_design_index + i) for i in range(size)]
+        rows['serie'] = GraphParameters.get_series(size, rng, pool=series)
+        for (name, table) in (('target_market', GraphParameters.TARGET_MARKET_TABLE),
+                              ('drive_wheels', GraphParameters.DRIVE_WHEEL_TABLE),
+                              ('battery_type', GraphParameters.BATTERY_TYPE_TABLE)):
+            rows[name] = table[GraphParameters.random_integers(rng, 0, len(table) - 1, size)]
+        rows['price'] = rng.uniform(1.0, 350.0, size)
+        rows['horsepower'] = GraphParameters.random_integers(rng, 60, 350, size)
+        rows['mpg'] = rng.uniform(20.0, 50.0, size)
+        rows['cylinder'] = GraphParameters.random_integers(rng, 3, 8, size)
+        rows['engine_size'] = GraphParameters.ENGINE_SIZE_TABLE[
+            GraphParameters.random_integers(rng, 0, len(GraphParameters.ENGINE_SIZE_TABLE) - 1, size)]
+        rows['controller'] = GraphParameters.random_integers(rng, 1, 7, size)
+        for name in ('isDiesel', 'hasTurbo', 'isPlugin'):
+            rows[name] = rng.uniform(size=size) < 0.5
+        return rows
+
+    @staticmethod
+    def get_node_type(rng=random):
+        return rng.choice(GraphParameters.NODE_TYPES)
+
+    @staticmethod
+    def get_design_name(design_index=None):
         """
         designName: string, no constraints
+        :param design_index: number of the design, optional (default: design_counter, incremented)
         :return: string
         """
-        GraphParameters.design_counter += 1
-        suffix = 'th' if 11 <= GraphParameters.design_counter <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(
-                GraphParameters.design_counter % 10, 'th')
+        if design_index is None:
+            GraphParameters.design_counter += 1
+            design_index = GraphParameters.design_counter
+        suffix = 'th' if 11 <= design_index <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(design_index % 10, 'th')
         return "%s%s Example" % (
-            GraphParameters.design_counter, suffix)  # "design-" + ''.join(choice('0123456789ABCDEF') for i in range(4))
+            design_index, suffix)  # "design-" + ''.join(choice('0123456789ABCDEF') for i in range(4))
 
     @staticmethod
-    def get_serie(probability_of_using_same_serie=0.1):
+    def get_serie(probability_of_using_same_serie=0.1, rng=random, pool=None):
         """
         string enumeration, no constraints on the value, but can be a more than one architecture with the same value
+        :param pool: list of reusable serie values (see add_serie), optional (default: SERIE)
         :return: string
         """
-        if random() < probability_of_using_same_serie and GraphParameters.SERIE:
-            return choice(list(GraphParameters.SERIE))
-        serie = "Alpha-" + ''.join(choice('0123456789ABCDEF-') for i in range(8)).strip("-")
-        GraphParameters.SERIE.add(serie)
+        pool = pool if pool is not None else GraphParameters.SERIE
+        if rng.random() < probability_of_using_same_serie and pool:
+            return rng.choice(pool)
+        serie = "Alpha-" + ''.join(rng.choice('0123456789ABCDEF-') for i in range(8)).strip("-")
+        GraphParameters.add_serie(serie, rng.random(), pool)
         return serie
 
     @staticmethod
-    def get_target_market():
+    def add_serie(serie, eviction=None, pool=None):
+        """
+        Add a serie value to the pool of reusable series. Once the pool is full (MAX_SERIE_POOL_SIZE),
+        a randomly chosen entry is replaced, so the pool stays bounded and reuse stays O(1).
+        :param serie: serie value
+        :param eviction: random number in [0, 1) selecting the entry to be replaced, optional
+        :param pool: list of reusable serie values, optional (default: SERIE)
+        :return: None
+        """
+        pool = pool if pool is not None else GraphParameters.SERIE
+        if len(pool) < GraphParameters.MAX_SERIE_POOL_SIZE:
+            pool.append(serie)
+        else:
+            if eviction is None:
+                eviction = random.random()
+            pool[int(eviction * len(pool))] = serie
+
+    @staticmethod
+    def get_target_market(rng=random):
         """
         targetMarket { Europe | Asia | South America }
         :return: string
         """
-        return choice(GraphParameters.TARGET_MARKETS)
+        return rng.choice(GraphParameters.TARGET_MARKETS)
 
     @staticmethod
-    def get_drive_wheels():
+    def get_drive_wheels(rng=random):
         """
         :return: string
         """
-        return choice(GraphParameters.DRIVE_WHEELS)
+        return rng.choice(GraphParameters.DRIVE_WHEELS)
 
     @staticmethod
-    def get_battery_type():
+    def get_battery_type(rng=random):
         """
         battery_type: { Li-ion polymer | Lithium-Ion | VRLA, NiCd }
         :return: string
         """
-        return choice(GraphParameters.BATTERY_TYPE)
+        return rng.choice(GraphParameters.BATTERY_TYPE)
 
     @staticmethod
-    def get_price():
+    def get_price(rng=random):
         """
         double in the range of 1 to 350
         :return: float
         """
-        return uniform(1.0, 350.0)
+        return rng.uniform(1.0, 350.0)
 
     @staticmethod
-    def get_horse_power():
+    def get_horse_power(rng=random):
         """
         horsepower: integer in the range of 60 to 350
         :return: integer
         """
-        return float(randint(60, 350))  # added float as the sample files requires field to be a double
+        return float(rng.randint(60, 350))  # added float as the sample files requires field to be a double
 
     @staticmethod
-    def get_mpg():
+    def get_mpg(rng=random):
         """
         double in the range of 20 to 50
         :return: float
         """
-        return uniform(20.0, 50.0)
+        return rng.uniform(20.0, 50.0)
 
     @staticmethod
-    def get_cylinder():
+    def get_cylinder(rng=random):
         """
         cylinder: integer in the range of 3 to 8
         :return: integer
         """
-        return randint(3, 8)
+        return rng.randint(3, 8)
 
     @staticmethod
     def double_range(start, stop, step):
@@ -124,42 +268,41 @@ class GraphParameters:
             r += step
 
     @staticmethod
-    def get_engine_size():
+    def get_engine_size(rng=random):
         """
         double between 1.2 and 4.0
         :return: double
         """
-        possibilities = [d for d in GraphParameters.double_range(1.2, 4.2, 0.2)]
-        return choice(possibilities)
+        return rng.choice(GraphParameters.ENGINE_SIZES)
 
     @staticmethod
-    def get_controller():
+    def get_controller(rng=random):
         """
         controller: integer between 1 and 7
         :return: integer between 1 and 7
         """
-        return randint(1, 7)
+        return rng.randint(1, 7)
 
     @staticmethod
-    def get_is_diesel():
+    def get_is_diesel(rng=random):
         """
         isDiesel: randomly { true | false}
         :return: boolean
         """
-        return bool(getrandbits(1))
+        return bool(rng.getrandbits(1))
 
     @staticmethod
-    def get_has_turbo():
+    def get_has_turbo(rng=random):
         """
         hasTurbo: randomly {true | false }
         :return: boolean
         """
-        return bool(getrandbits(1))
+        return bool(rng.getrandbits(1))
 
     @staticmethod
-    def get_is_plugin():
+    def get_is_plugin(rng=random):
         """
         isPlugIn : randomly { true | false }}
         :return: boolean
         """
-        return bool(getrandbits(1))
+        return bool(rng.getrandbits(1))
@@ -0,0 +1,128 @@
+import os
+import tarfile
+import zipfile
+from contextlib import closing
+from io import BytesIO
+
+import numpy as np
+
+from CompactGraph import CompactGraph
+from GraphMLWriter import GraphMLWriter
+from GraphParameters import GraphParameters
+from GraphUtils import GraphUtils
+
+
+class GraphSetArchive:
+    """
+    Single packed output file for a whole graph set, instead of one or two files per graph:
+    - 'tar': graphs.tar with the post-processed XML of every graph (<graph file name>.xml members)
+    - 'npz': graphs.npz with numpy tables over all the graphs, each row tagged with the graph index:
+        node_graph, node_id, node_type (code, see node_type_names) - one row per node
+        edge_graph, edge_source, edge_target - one row per edge
+        graph_index, graph_<attribute> - one row per graph (attributes of GraphUtils.GRAPH_ATTRIBUTES)
+      node ids are numbered from 1, as in the post-processed XML.
+    The content of a graph is prepared by graph_payload (in the process that generated the graph) and added
+    by the process writing the archive, in graph index order.
+    """
+
+    FORMATS = ['tar', 'npz']
+    # fixed member times, so the same graphs always give the same archive
+    MTIME = 0
+    ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+    def __init__(self, folder_path, output_format):
+        """
+        :param folder_path: folder of the graph set
+        :param output_format: 'tar' or 'npz'
+        """
+        if output_format not in GraphSetArchive.FORMATS:
+            raise ValueError("Unknown archive format: %s" % output_format)
+        self.output_format = output_format
+        self.file_path = os.path.join(folder_path, "graphs." + output_format)
+        self.tar = tarfile.open(self.file_path, 'w') if output_format == 'tar' else None
+        self.tables = {'node_graph': [], 'node_id': [], 'node_type': [], 'edge_graph': [], 'edge_source': [],
+                       'edge_target': []}
+        self.graph_indices = []
+        self.graph_attributes = []
+
+    @staticmethod
+    def graph_payload(graph, output_format, name):
+        """
+        :param graph: generated graph (networkx graph, GraphVariant or CompactGraph)
+        :param output_format: 'tar' or 'npz'
+        :param name: file name of the graph
+        :return: content of the graph to be passed to add()
+        """
+        if output_format == 'tar':
+            return name + ".xml", GraphMLWriter.to_string(graph)
+        attributes = dict((key, value) for (key, value) in graph.graph.items() if key != 'name')
+        if isinstance(graph, CompactGraph):
+            sources, targets = graph.edge_arrays()
+            return (np.arange(graph.number_of_nodes()), graph.node_type_array(), sources, targets, attributes)
+        nodes = graph.nodes(data=True)
+        node_ids = np.array([node for (node, data) in nodes], dtype=np.int64)
+        node_types = np.array([GraphParameters.NODE_TYPES.index(data['type']) for (node, data) in nodes],
+                              dtype=np.int8)
+        edges = np.array(graph.edges(), dtype=np.int64).reshape(-1, 2)
+        return node_ids, node_types, edges[:, 0], edges[:, 1], attributes
+
+    def add(self, index, payload):
+        """
+        :param index: graph index
+        :param payload: content of the graph (see graph_payload)
+        :return: None
+        """
+        if self.tar is not None:
+            name, data = payload
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = GraphSetArchive.MTIME
+            self.tar.addfile(info, BytesIO(data))
+            return
+        node_ids, node_types, sources, targets, attributes = payload
+        self.tables['node_graph'].append(np.full(len(node_ids), index, dtype=np.int32))
+        self.tables['node_id'].append(np.asarray(node_ids, dtype=np.int32) + 1)
+        self.tables['node_type'].append(np.asarray(node_types, dtype=np.int8))
+        self.tables['edge_graph'].append(np.full(len(sources), index, dtype=np.int32))
+        self.tables['edge_source'].append(np.asarray(sources, dtype=np.int32) + 1)
+        self.tables['edge_target'].append(np.asarray(targets, dtype=np.int32) + 1)
+        self.graph_indices.append(index)
+        self.graph_attributes.append(attributes)
+
+    def close(self):
+        """
+        Write and close the archive.
+        :return: None
+        """
+        if self.tar is not None:
+            self.tar.close()
+            return
+        arrays = {'node_type_names': np.array(GraphParameters.NODE_TYPES),
+                  'graph_index': np.array(self.graph_indices, dtype=np.int32)}
+        for (name, chunks) in self.tables.items():
+            arrays[name] = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int32)
+        names = set(name for attributes in self.graph_attributes for name in attributes)
+        for name in [name for name in GraphUtils.GRAPH_ATTRIBUTES if name in names] + sorted(
+                names - set(GraphUtils.GRAPH_ATTRIBUTES)):
+            arrays['graph_' + name] = np.array([attributes.get(name) for attributes in self.graph_attributes])
+        GraphSetArchive.save_npz(self.file_path, arrays)
+
+    @staticmethod
+    def save_npz(file, arrays, compressed=True):
+        """
+        Same as numpy.savez_compressed (or numpy.savez), but the members get a fixed time, so the same arrays
+        always give the same file.
+        :param file: path or writable binary stream
+        :param arrays: dictionary of name -> array
+        :param compressed: whether to deflate the members, optional
+        :return: None
+        """
+        compression = zipfile.ZIP_DEFLATED if compressed else zipfile.ZIP_STORED
+        with closing(zipfile.ZipFile(file, 'w', compression, allowZip64=True)) as archive:
+            for name in sorted(arrays):
+                data = BytesIO()
+                np.lib.format.write_array(data, np.asanyarray(arrays[name]))
+                info = zipfile.ZipInfo(name + ".npy", date_time=GraphSetArchive.ZIP_DATE_TIME)
+                info.compress_type = compression
+                info.external_attr = 0o600 << 16
+                archive.writestr(info, data.getvalue())
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+
+
+class GraphSetManifest:
+    """
+    Checkpoint of a graph set: manifest.jsonl in the folder of the set, one JSON object per line.
+    The first line holds the settings of the set (master seed, number of graphs, parameters, output format), every
+    other line records a graph whose files are completely written: its index (0 for the common graph info), its
+    seed, the SHA-256 of each of its files and, for unique sets, the hash of the graph (see GraphHashIndex).
+    Lines are only appended and flushed one by one, so after a crash the manifest lists the graphs that were done;
+    a later line for the same index replaces the earlier one.
+    A resumed run (see MainGraphGenerator.generate_graph_set) skips the graphs listed with unchanged files and,
+    as every graph only depends on its seed, ends with the same files as an uninterrupted run.
+
+    Examples
+    --------
+    >>> manifest = GraphSetManifest("./set1")
+    >>> manifest.load()
+    >>> manifest.is_done(5)
+    """
+
+    FILE_NAME = "manifest.jsonl"
+    HASH_BLOCK_SIZE = 1 << 20
+
+    def __init__(self, folder_path):
+        self.folder_path = folder_path
+        self.file_path = os.path.join(folder_path, GraphSetManifest.FILE_NAME)
+        self.settings = None
+        self.graphs = {}  # index -> {'graph': index, 'seed': seed, 'files': {file name: sha256}}
+        self.stream = None
+
+    def load(self):
+        """
+        Read the manifest of the folder, if any (an incomplete last line, left by a crash, is ignored).
+        :return: True if a manifest was found
+        """
+        if not os.path.isfile(self.file_path):
+            return False
+        with open(self.file_path) as stream:
+            for line in stream:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if self.settings is None:
+                    self.settings = entry
+                else:
+                    self.graphs[entry['graph']] = entry
+        return self.settings is not None
+
+    def check_settings(self, settings):
+        """
+        :param settings: settings of the run
+        :return: None
+        :raise ValueError: if the settings differ from the ones recorded in the manifest
+        """
+        different = sorted(name for name in set(settings) | set(self.settings)
+                           if settings.get(name) != self.settings.get(name))
+        if different:
+            raise ValueError("The settings of the set differ from the ones in %s: %s" % (self.file_path, ", ".join(
+                "%s (%s, was %s)" % (name, settings.get(name), self.settings.get(name)) for name in different)))
+
+    def open(self, settings, append=False):
+        """
+        Open the manifest for recording graphs.
+        :param settings: settings of the run (written as the first line of a new manifest)
+        :param append: whether to keep the graphs of the existing manifest
+        :return: None
+        """
+        if append and self.settings is not None:
+            self.stream = open(self.file_path, "a")
+        else:
+            self.graphs = {}
+            self.settings = settings
+            self.stream = open(self.file_path, "w")
+            self.write_line(settings)
+
+    def write_line(self, entry):
+        self.stream.write(json.dumps(entry, sort_keys=True) + "\n")
+        self.stream.flush()
+
+    def add(self, index, seed, files, graph_hash=None):
+        """
+        Record a graph whose files are completely written.
+        :param index: index of the graph (0 for the common graph info)
+        :param seed: seed of the graph
+        :param files: dictionary of file name -> sha256 (see file_hash)
+        :param graph_hash: hash of the graph (see GraphHashIndex), optional
+        :return: None
+        """
+        entry = {'graph': index, 'seed': seed, 'files': files}
+        if graph_hash is not None:
+            entry['hash'] = graph_hash
+        self.write_line(entry)
+        self.graphs[index] = entry
+
+    def is_done(self, index, seed=None):
+        """
+        :param index: index of the graph
+        :param seed: expected seed of the graph, optional
+        :return: True if the graph is recorded (with the given seed) and all its files are unchanged
+        """
+        entry = self.graphs.get(index)
+        if entry is None or (seed is not None and entry['seed'] != seed):
+            return False
+        for (name, digest) in entry['files'].items():
+            file_path = os.path.join(self.folder_path, name)
+            if not os.path.isfile(file_path) or GraphSetManifest.file_hash(file_path) != digest:
+                return False
+        return True
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    @staticmethod
+    def file_hash(file_path):
+        """
+        :return: SHA-256 (hex digest) of the content of the file
+        """
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as stream:
+            for block in iter(lambda: stream.read(GraphSetManifest.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_hashes(file_paths):
+        """
+        :return: dictionary of file name -> SHA-256 of the given files
+        """
+        return dict((os.path.basename(file_path), GraphSetManifest.file_hash(file_path)) for file_path in file_paths)
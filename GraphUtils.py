@@ -1,8 +1,17 @@
+import codecs
 import xml.etree.ElementTree as ET
 from xml.etree.ElementTree import ParseError
 
+try:
+    from xml.etree.cElementTree import iterparse, ParseError as IterParseError  # C accelerated parser (python 2)
+except ImportError:
+    from xml.etree.ElementTree import iterparse, ParseError as IterParseError
+
+import networkx as nx
 from pathlib import Path
 
+from GenerationMetrics import NO_METRICS
+
 
 class GraphUtils:
     """
@@ -10,11 +19,24 @@ class GraphUtils:
     1) replace networkx generated attribute keys with predefined(user defined) attribute_names (key and data)
     2) remove auto generated graph name attribute and relevant data
     3) adds custom defined graph name for the graph
-    TODO: Currently uses xpath to locate features of the xml file to be post-processed. This needs optimisation.
+    The key section is read once into an id -> attribute name map, then the rest of the document is rewritten
+    in a single traversal (see post_process_graphml).
     TODO: Implements minimal validation of external input. Need to fix this.
     """
 
-    def __init__(self):
+    # graph and node attributes whose networkx generated key ids are replaced with the attribute names
+    GRAPH_ATTRIBUTES = ['designName', 'serie', 'target_market', 'drive_wheels', 'battery_type', 'price',
+                        'horsepower', 'mpg', 'cylinder', 'engine_size', 'controller', 'isDiesel', 'hasTurbo',
+                        'isPlugin']
+    NODE_ATTRIBUTES = ['name', 'type']
+    # number formats of attribute values (price with two decimal places, mpg and horsepower with one)
+    VALUE_FORMATS = {'price': "%.2f", 'mpg': "%.1f", 'horsepower': "%.1f"}
+
+    def __init__(self, metrics=None):
+        """
+        :param metrics: GenerationMetrics recording the duration of the post-processing, optional
+        """
+        self.metrics = metrics if metrics is not None else NO_METRICS
         self.xml_doc = None  # holds currently parsed xml document
         self.namespaces = {'gml': 'http://graphml.graphdrawing.org/xmlns'}  # namespace used, add more as needed
         self.file_name = "temp"  # file name to save the postprocessed output
@@ -39,15 +61,130 @@ class GraphUtils:
             e.set('key', attribute_name)
             if attribute_name == 'designName':
                 # extract designName while we process the replacement of ids. This will be used for file name
-                self.file_name = e.text.lower().replace(' ', '_') + "_graph"
-            if attribute_name == 'price':
-                # format price with two decimal places
-                val = float(e.text)
-                e.text = "%.2f" % val
-            if attribute_name == 'mpg' or attribute_name == 'horsepower':
-                # format horsepower as one decimal place
-                val = float(e.text)
-                e.text = "%.1f" % val
+                self.file_name = GraphUtils.graph_id_from_design_name(e.text)
+            e.text = GraphUtils.format_value(attribute_name, e.text)
+
+    @staticmethod
+    def new_key_id(element, attribute_name, key_id):
+        """
+        :param element: element the key is defined for (graph, node, ...)
+        :param attribute_name: attribute name of the key
+        :param key_id: networkx generated key id
+        :return: key id to be used in the post-processed file, or None if the key is to be removed
+                 (auto-generated graph name)
+        """
+        if element == 'graph' and attribute_name == 'name':
+            return None
+        if (element == 'graph' and attribute_name in GraphUtils.GRAPH_ATTRIBUTES) or (
+                element == 'node' and attribute_name in GraphUtils.NODE_ATTRIBUTES):
+            return attribute_name
+        return key_id
+
+    def build_key_map(self):
+        """
+        Read the key section of the parsed document once.
+        :return: dictionary of networkx generated key id -> (new key id or None if removed, attribute name)
+        """
+        key_map = {}
+        for e in self.xml_doc.getroot().findall('gml:key', self.namespaces):
+            key_id = e.get('id')
+            attribute_name = e.get('attr.name')
+            key_map[key_id] = (GraphUtils.new_key_id(e.get('for'), attribute_name, key_id), attribute_name)
+        return key_map
+
+    def rewrite_data(self, parent, key_map):
+        """
+        Rename the keys of the data elements of a node or edge element and format their values.
+        :param parent: node or edge element
+        :param key_map: see build_key_map
+        :return: None
+        """
+        for e in list(parent):
+            if self.strip_namespace(e) == 'data' and not self.rewrite_data_element(e, key_map):
+                parent.remove(e)
+
+    def rewrite_data_element(self, e, key_map, graph_data=False):
+        """
+        Rename the key of a data element and format its value.
+        :param e: data element
+        :param key_map: see build_key_map
+        :param graph_data: whether the data element belongs to the graph (designName is picked up as graph id)
+        :return: False if the data element is to be removed, True otherwise
+        """
+        key_id, attribute_name = key_map.get(e.get('key'), (e.get('key'), None))
+        if key_id is None:
+            return False
+        e.set('key', key_id)
+        if graph_data and attribute_name == 'designName':
+            self.file_name = GraphUtils.graph_id_from_design_name(e.text)
+        if attribute_name in GraphUtils.VALUE_FORMATS:
+            e.text = GraphUtils.format_value(attribute_name, e.text)
+        return True
+
+    @staticmethod
+    def strip_namespace(elem):
+        """
+        Remove the graphml namespace from the tag of an element.
+        :return: tag without namespace
+        """
+        if elem.tag.startswith('{'):
+            elem.tag = elem.tag[elem.tag.find('}') + 1:]
+        return elem.tag
+
+    @staticmethod
+    def format_value(attribute_name, text):
+        """
+        Apply the number format of the attribute (if any) to a data value.
+        :param attribute_name: attribute name
+        :param text: value as written in the GraphML file
+        :return: formatted value
+        """
+        if attribute_name in GraphUtils.VALUE_FORMATS:
+            return GraphUtils.VALUE_FORMATS[attribute_name] % float(text)
+        return text
+
+    @staticmethod
+    def graph_id_from_design_name(design_name):
+        """
+        :param design_name: designName attribute of a graph, e.g. "1st Example"
+        :return: graph id (also used as the file name), e.g. "1st_example_graph"
+        """
+        return design_name.lower().replace(' ', '_') + "_graph"
+
+    @staticmethod
+    def post_process_graph_attributes(attributes):
+        """
+        In-memory version of the graph attribute post-processing: the auto-generated graph name is dropped,
+        the graph id is derived from the designName and the number formats are applied (values stay numbers).
+        :param attributes: graph attributes (dictionary)
+        :return: new dictionary of post-processed attributes
+        """
+        processed = {}
+        for (name, value) in attributes.items():
+            if name == 'name':
+                continue
+            if name in GraphUtils.VALUE_FORMATS:
+                value = float(GraphUtils.format_value(name, value))
+            processed[name] = value
+        processed['id'] = GraphUtils.graph_id_from_design_name(attributes['designName']) \
+            if 'designName' in attributes else "temp"
+        return processed
+
+    @staticmethod
+    def post_process_graph(graph):
+        """
+        In-memory equivalent of post_process_graphml, for graphs that are used without being saved: node ids
+        start from 1, edges get sequential ids (id edge attribute) and graph attributes are post-processed
+        (see post_process_graph_attributes).
+        :param graph: generated graph (networkx graph or GraphVariant, nodes numbered from 0)
+        :return: new networkx graph
+        """
+        processed = nx.Graph()
+        processed.graph = GraphUtils.post_process_graph_attributes(graph.graph)
+        processed.add_nodes_from((node + 1, dict(data)) for (node, data) in graph.nodes(data=True))
+        processed.add_edges_from((fr + 1, to + 1, dict(data, id=str(edge_id)))
+                                 for (edge_id, (fr, to, data)) in enumerate(graph.edges(data=True), 1))
+        return processed
 
     def remove_graph_name(self):
         """
@@ -72,6 +209,8 @@ class GraphUtils:
         """
         root = self.xml_doc.getroot()
         graph_element = root.find('gml:graph', self.namespaces)
+        if graph_element is None:  # namespace already removed
+            graph_element = root.find('graph')
         graph_element.set('id', file_name)
 
     def re_compute_node_ids(self):
@@ -121,30 +260,49 @@ class GraphUtils:
             if path.is_file():
 
                 try:
+                    start = self.metrics.start()
                     self.xml_doc = ET.parse(file_path)
-                    attributes = ['designName', 'serie', 'target_market', 'drive_wheels', 'battery_type', 'price',
-                                  'horsepower', 'mpg', 'cylinder',
-                                  'engine_size', 'controller', 'isDiesel', 'hasTurbo', 'isPlugin']
-                    for attribute in attributes:
-                        self.replace_id(attribute)  # replace ids of all the pre-defined attributes with attribute name
-
-                    # process node attributes
-                    attributes = ['name', 'type']
-                    for attribute in attributes:
-                        self.replace_id(attribute, False)
-
-                    self.remove_graph_name()
+                    self.file_name = "temp"
+                    key_map = self.build_key_map()  # replace ids of all the pre-defined attributes with attribute name
 
-                    file_name = self.file_name  # path.name[:path.name.rfind('.graphml')]+".xml"
-                    self.add_graph_id(file_name)
-
-                    self.re_compute_node_ids()
-
-                    self.add_edge_ids()
-
-                    self.remove_namespace()
+                    # single traversal: keys, graph data, nodes and edges (namespace removed on the way)
+                    root = self.xml_doc.getroot()
+                    self.strip_namespace(root)
+                    edge_id = 0
+                    for e in list(root):
+                        tag = self.strip_namespace(e)
+                        if tag == 'key':
+                            key_id = key_map[e.get('id')][0]
+                            if key_id is None:
+                                root.remove(e)  # auto-generated graph name
+                                continue
+                            e.set('id', key_id)
+                            for child in e.iter():
+                                self.strip_namespace(child)
+                        elif tag == 'graph':
+                            for child in list(e):
+                                child_tag = self.strip_namespace(child)
+                                if child_tag == 'data':
+                                    if not self.rewrite_data_element(child, key_map, graph_data=True):
+                                        e.remove(child)  # auto-generated graph name
+                                elif child_tag == 'node':
+                                    # node ids are initally numbered from 0, make them starting 1
+                                    child.set('id', str(int(child.get('id')) + 1))
+                                    self.rewrite_data(child, key_map)
+                                elif child_tag == 'edge':
+                                    # by default generated edges have no ids, so create them sequentially
+                                    edge_id += 1
+                                    child.set('id', str(edge_id))
+                                    child.set('source', str(int(child.get('source')) + 1))
+                                    child.set('target', str(int(child.get('target')) + 1))
+                                    self.rewrite_data(child, key_map)
+                            self.add_graph_id(self.file_name)
+                        else:
+                            for child in e.iter():
+                                self.strip_namespace(child)
 
                     self.add_namespace()
+                    self.metrics.stop('post_process_graphml', start)
                 except ParseError:
                     print("Unable to parse the given GraphML file.")
 
@@ -154,6 +312,88 @@ class GraphUtils:
         else:
             raise Exception("Empty file path!")
 
+    def post_process_graphml_streaming(self, file_path, output_file_path):
+        """
+        Streaming version of post_process_graphml for large files: the .graphml file is read with iterparse
+        and the post-processed .xml file is written while reading, in a single pass with constant memory
+        (processed elements are discarded as soon as they have been written).
+        :param file_path: generated .graphml file to be post-processed
+        :param output_file_path: path of the post-processed .xml file
+        :return: None.
+        """
+        from GraphMLWriter import GraphMLWriter  # imported here as GraphMLWriter depends on this module
+
+        if not file_path:
+            raise Exception("Empty file path!")
+        if not Path(file_path).is_file():
+            raise IOError("File path error! Could not locate file in: " + file_path + ".")
+
+        ns = '{' + self.namespaces['gml'] + '}'
+        key_ids = {}  # networkx generated key id -> (new key id, attribute name)
+        removed_keys = set()  # ids of the auto-generated graph name keys
+        graph_data = []  # graph data is held back until the graph id (designName) is known
+        graph_started = False
+        item_data = None  # data of the node/edge being read (None while reading graph data)
+        root = graph = None
+        self.file_name = "temp"
+        start = self.metrics.start()
+        try:
+            with codecs.open(output_file_path, 'w', 'utf8') as stream:
+                writer = GraphMLWriter(stream)
+                for (event, elem) in iterparse(file_path, events=('start', 'end')):
+                    tag = elem.tag[len(ns):] if elem.tag.startswith(ns) else elem.tag
+                    if event == 'start':
+                        if tag == 'graphml':
+                            root = elem
+                            writer.write_header()
+                        elif tag == 'graph':
+                            graph = elem
+                        elif tag in ('node', 'edge'):
+                            if not graph_started:
+                                writer.start_graph(self.file_name, graph_data)
+                                graph_started = True
+                            item_data = []
+                        continue
+
+                    if tag == 'key':
+                        attribute_name = elem.get('attr.name')
+                        element = elem.get('for')
+                        key_id = GraphUtils.new_key_id(element, attribute_name, elem.get('id'))
+                        if key_id is None:
+                            removed_keys.add(elem.get('id'))
+                        else:
+                            key_ids[elem.get('id')] = (key_id, attribute_name)
+                            writer.write_key(key_id, element, attribute_name, elem.get('attr.type'))
+                        root.clear()
+                    elif tag == 'data':
+                        key = elem.get('key')
+                        if key in removed_keys:
+                            continue
+                        key_id, attribute_name = key_ids.get(key, (key, key))
+                        text = GraphUtils.format_value(attribute_name, elem.text or "")
+                        if item_data is not None:
+                            item_data.append((key_id, text))
+                        else:
+                            if attribute_name == 'designName':
+                                self.file_name = GraphUtils.graph_id_from_design_name(text)
+                            graph_data.append((key_id, text))
+                    elif tag == 'node':
+                        writer.write_node(str(int(elem.get('id')) + 1), item_data)
+                        item_data = None
+                        graph.clear()
+                    elif tag == 'edge':
+                        writer.write_edge(str(int(elem.get('source')) + 1), str(int(elem.get('target')) + 1),
+                                          item_data)
+                        item_data = None
+                        graph.clear()
+                    elif tag == 'graph':
+                        if not graph_started:
+                            writer.start_graph(self.file_name, graph_data)
+                        writer.end_graph()
+            self.metrics.stop('post_process_graphml', start)
+        except IterParseError:
+            print("Unable to parse the given GraphML file.")
+
     def save_file(self, file_name):
         """
         :param file_name: file to be saved (save a copy of the postprocessed file)
@@ -0,0 +1,75 @@
+from itertools import chain
+
+
+class GraphVariant:
+    """
+    Copy-on-write view of a graph generated from a common graph: the common graph (never modified) plus the
+    nodes and edges added to it. A variant only stores its own delta, so generating many variants of the same
+    common graph costs O(added nodes and edges) per variant instead of a copy of the common graph each time.
+    Offers the read methods used for saving graphs (graph, nodes, edges, number_of_nodes, number_of_edges);
+    to_networkx() builds a full networkx graph when one is needed.
+    Note: node and edge data of the common graph are shared and must not be modified through a variant.
+    """
+
+    def __init__(self, common_graph):
+        """
+        :param common_graph: networkx graph the variant is based on
+        """
+        self.common_graph = common_graph
+        self.graph = dict(common_graph.graph)  # graph attributes of the variant
+        self.added_nodes = []
+        self.added_node_data = {}  # node -> attribute dictionary
+        self.added_edges = []
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def has_node(self, node):
+        return node in self.added_node_data or self.common_graph.has_node(node)
+
+    def add_node(self, node, **attributes):
+        if self.has_node(node):
+            raise ValueError("Node %s already exists." % node)
+        self.added_nodes.append(node)
+        self.added_node_data[node] = attributes
+
+    def add_edge(self, fr, to):
+        """
+        Record an added edge. The caller makes sure the edge is new (e.g. through an EdgeSampler).
+        """
+        self.added_edges.append((fr, to))
+
+    def nodes_iter(self, data=False):
+        if data:
+            return chain(self.common_graph.nodes_iter(data=True),
+                         ((node, self.added_node_data[node]) for node in self.added_nodes))
+        return chain(self.common_graph.nodes_iter(), self.added_nodes)
+
+    def nodes(self, data=False):
+        return list(self.nodes_iter(data))
+
+    def edges_iter(self, data=False):
+        if data:
+            return chain(self.common_graph.edges_iter(data=True), ((fr, to, {}) for (fr, to) in self.added_edges))
+        return chain(self.common_graph.edges_iter(), self.added_edges)
+
+    def edges(self, data=False):
+        return list(self.edges_iter(data))
+
+    def number_of_nodes(self):
+        return self.common_graph.number_of_nodes() + len(self.added_nodes)
+
+    def number_of_edges(self):
+        return self.common_graph.number_of_edges() + len(self.added_edges)
+
+    def to_networkx(self):
+        """
+        Materialize the variant.
+        :return: new networkx graph with the nodes, edges and attributes of the variant
+        """
+        graph = self.common_graph.copy()
+        for node in self.added_nodes:
+            graph.add_node(node, **self.added_node_data[node])
+        graph.add_edges_from(self.added_edges)
+        graph.graph = dict(self.graph)
+        return graph
@@ -0,0 +1,52 @@
+import matplotlib.pyplot as plt
+import networkx as nx
+
+
+class GraphVisualiser:
+    """
+    Plotting of generated graphs (using matplotlib library).
+    This module is only imported when a graph is displayed (see GraphGenerator.show, CommonGraphGenerator.show),
+    so generating graphs does not load matplotlib and works on servers without a display.
+
+    Examples
+    --------
+    >>> GraphVisualiser.show_graph(graph)
+    """
+
+    @staticmethod
+    def show_graph(graph, labels=True, with_labels=False):
+        """
+        Display a graph.
+        :param graph: networkx graph
+        :param labels: whether to label the nodes with their type
+        :param with_labels: whether to also label the nodes with their id (only used with labels)
+        :return: None
+        """
+        if not labels:
+            nx.draw_networkx(graph)
+        else:
+            pos = nx.spring_layout(graph)
+            nx.draw(graph, pos, with_labels=with_labels)
+            node_labels = nx.get_node_attributes(graph, 'type')
+            nx.draw_networkx_labels(graph, pos, labels=node_labels)
+        plt.show()
+
+    @staticmethod
+    def show_added_edges(graph, added_edges):
+        """
+        Show two diagrams: the graph before the edges were added, and the graph with the added edges highlighted
+        (for debugging purpose).
+        :param graph: networkx graph (with the added edges)
+        :param added_edges: list of the added edges
+        :return: None
+        """
+        plt.figure(1)
+        plt.clf()
+        fig, ax = plt.subplots(2, 1, num=1, sharex=True, sharey=True)
+        previous_graph = graph.copy()
+        previous_graph.remove_edges_from(added_edges)
+        pos = nx.spring_layout(previous_graph)
+        nx.draw_networkx(previous_graph, pos=pos, ax=ax[0])
+        nx.draw_networkx(graph, pos=pos, ax=ax[1])
+        nx.draw_networkx_edges(graph, pos=pos, ax=ax[1], edgelist=added_edges, edge_color='b', width=4)
+        plt.show()
@@ -0,0 +1,109 @@
+import sys
+import threading
+from collections import deque
+from Queue import Queue
+
+
+class WriteBehindJob:
+    """
+    A job run by a WriteBehindQueue thread. Holds the result, or the exception raised by the job until
+    the caller waits for it.
+    """
+
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def run(self):
+        try:
+            self.result = self.function(*self.args)
+        except BaseException:
+            self.error = sys.exc_info()
+        finally:
+            self.done.set()
+
+    def wait(self):
+        """
+        :return: result of the job (the exception raised by the job is re-raised here, in the caller's thread)
+        """
+        self.done.wait()
+        if self.error is not None:
+            raise self.error[0], self.error[1], self.error[2]
+        return self.result
+
+
+class WriteBehindQueue:
+    """
+    Background threads running I/O jobs (serialization and file writes) while the caller keeps working, e.g.
+    generating the next graph. At most max_pending jobs are queued or running: map() waits for the oldest one
+    before submitting more (backpressure), so the memory held by pending jobs is bounded.
+    Results are returned in submission order and errors raised by a job are re-raised in the caller.
+
+    Examples
+    --------
+    >>> writer = WriteBehindQueue(threads = 2, max_pending = 8)
+    >>> try:
+    ...     for result in writer.map(save, graphs):
+    ...         print result
+    ... finally:
+    ...     writer.close()
+    """
+
+    def __init__(self, threads=1, max_pending=8):
+        """
+        :param threads: number of writer threads
+        :param max_pending: maximum number of jobs queued or running
+        """
+        self.max_pending = max(1, max_pending)
+        self.jobs = Queue()
+        self.threads = []
+        for i in range(max(1, threads)):
+            thread = threading.Thread(target=self.run_jobs)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def run_jobs(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            job.run()
+
+    def submit(self, function, *args):
+        """
+        Queue a job (without backpressure, see map).
+        :return: WriteBehindJob
+        """
+        job = WriteBehindJob(function, args)
+        self.jobs.put(job)
+        return job
+
+    def map(self, function, items):
+        """
+        Run function on each item in the background. The items are taken from the iterator in the caller's thread,
+        as long as fewer than max_pending jobs are pending.
+        :param function: job function
+        :param items: iterator over the job arguments
+        :return: generator of the results, in order
+        """
+        pending = deque()
+        for item in items:
+            pending.append(self.submit(function, item))
+            while len(pending) >= self.max_pending:
+                yield pending.popleft().wait()
+        while pending:
+            yield pending.popleft().wait()
+
+    def close(self):
+        """
+        Stop the threads once the queued jobs are done.
+        :return: None
+        """
+        for thread in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
@@ -1,12 +1,254 @@
 import getopt
+import hashlib
+import json
 import os
+import random
 import sys
+import threading
+import time
+from itertools import chain
+from multiprocessing import Pool
+from Queue import Full, Queue
 
 from pathlib import Path
 
+try:
+    import yaml  # optional, for YAML batch manifests
+except ImportError:
+    yaml = None
+
 from CommonGraphGenerator import CommonGraphGenerator
+from CommonGraphStatistics import CommonGraphStatistics
+from GenerationMetrics import GenerationMetrics, NO_METRICS
 from GraphGenerator import GraphGenerator
+from GraphHashIndex import GraphHashIndex
+from GraphMLWriter import GraphMLWriter
+from GraphModels import GraphModels
+from GraphParameters import GraphParameters
+from GraphSetArchive import GraphSetArchive
+from GraphSetManifest import GraphSetManifest
 from GraphUtils import GraphUtils
+from WriteBehindQueue import WriteBehindQueue
+
+# per-process state of graph set generation (set once per worker process by init_graph_worker)
+_worker_state = {}
+# output formats of graph sets: one file per graph (plain or compressed XML) or one archive per set
+OUTPUT_FORMATS = ['xml', 'gz', 'zst'] + GraphSetArchive.FORMATS
+# keys of a set spec of a batch manifest (see MainGraphGenerator.run_batch), named after the command line options
+BATCH_SET_KEYS = ['output', 'no_of_graphs', 'common_graph_min_no_of_nodes', 'common_graph_max_no_of_nodes',
+                  'total_no_of_nodes', 'seed', 'only', 'skip_graphml', 'metrics', 'format', 'writer_threads', 'resume',
+                  'unique', 'hash_index', 'model', 'model_parameters', 'target_edges', 'target_average_degree',
+                  'stats_format', 'summary_only']
+# attempts at generating a graph that is not a duplicate (see generate_graph_set(unique=True))
+MAX_UNIQUE_ATTEMPTS = 100
+
+
+def derive_seed(master_seed, index):
+    """
+    Derive the seed of a single graph from the master seed of a set. The common graph uses index 0 and
+    the graphs of the set use indices 1..n, so any graph can be regenerated on its own.
+    :param master_seed: master seed of the set (integer)
+    :param index: index of the graph in the set
+    :return: integer seed
+    """
+    digest = hashlib.sha256(("%d:%d" % (master_seed, index)).encode("ascii")).hexdigest()
+    return int(digest[:8], 16)
+
+
+def graph_file_name(index):
+    """
+    :param index: index of the graph in the set (starting from 1)
+    :return: file name of the graph, e.g. 1st_example_graph.graphml
+    """
+    suffix = 'th' if 11 <= index <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(index % 10, 'th')
+    return "%s%s_example_graph.graphml" % (index, suffix)
+
+
+def init_graph_worker(common_graph, generator_parameters, series, save_graphml=True, metrics=False,
+                      output_format='xml', unique=False):
+    """
+    Initialise a (worker) process for generating graphs of a set.
+    :param common_graph: common graph shared by all the graphs of the set
+    :param generator_parameters: keyword arguments for GraphGenerator
+    :param series: serie values the graphs of the set may share
+    :param save_graphml: whether to also save the intermediate networkx .graphml file
+    :param metrics: whether to record the metrics of each graph (see GenerationMetrics)
+    :param output_format: output format of the graphs (see OUTPUT_FORMATS)
+    :param unique: whether to compute the hash of each graph (see GraphHashIndex)
+    :return: None
+    """
+    # one generator per process: the common graph and its indexes are shared by all the graphs it generates
+    _worker_state['graph_generator'] = GraphGenerator(common_graph, **generator_parameters)
+    _worker_state['series'] = series
+    _worker_state['save_graphml'] = save_graphml
+    _worker_state['metrics'] = metrics
+    _worker_state['output_format'] = output_format
+    _worker_state['unique'] = unique
+
+
+def generate_set_graph(graph_generator, series, index, seed, compact=False):
+    """
+    Generate the graph of a set with the given index. The graph only depends on the arguments, so any graph of a
+    set can be generated on its own (in any process).
+    :param graph_generator: GraphGenerator of the set (holding the common graph)
+    :param series: serie values the graphs of the set may share
+    :param index: index of the graph in the set
+    :param seed: seed of the graph (see derive_seed)
+    :param compact: whether to generate a CompactGraph instead of a GraphVariant
+    :return: generated graph (GraphVariant or CompactGraph)
+    """
+    graph_generator.rng = random.Random(seed)
+    # design names follow the graph index, every graph starts from the series of the set (no shared state)
+    if compact:
+        return graph_generator.generate_compact_graph(design_index=index, series=list(series))
+    # the common graph is not copied, only the added nodes/edges are stored
+    return graph_generator.generate_variant(design_index=index, series=list(series))
+
+
+def prefetch(iterator, size):
+    """
+    Iterate over an iterator that is advanced by a background thread, at most size items ahead of the consumer
+    (so memory stays bounded). Exceptions raised by the iterator are re-raised in the consumer. The thread stops
+    when the returned generator is closed.
+    :param iterator: iterator to be prefetched
+    :param size: maximum number of prefetched items
+    :return: generator
+    """
+    items = Queue(size)
+    stop = threading.Event()
+    end = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((end, None))
+        except BaseException:
+            put((None, sys.exc_info()))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error[0], error[1], error[2]
+            if item is end:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def generate_graph_task(task):
+    """
+    Generate, save and post-process a single graph of a set. The result only depends on the task and the
+    state given to init_graph_worker, so serial and parallel runs produce identical files.
+    :param task: (index, seed, path) tuple
+    :return: (path of the saved graph, metrics record of the graph or None if metrics are disabled,
+              content of the graph for the set archive or None, dictionary of written file name -> sha256,
+              hash of the graph (see GraphHashIndex) or None if the set is not unique) tuple
+    """
+    return save_graph_task(start_graph_task(task))
+
+
+def start_graph_task(task):
+    """
+    Generation part of generate_graph_task.
+    :param task: (index, seed, path) tuple
+    :return: generated task to be passed to save_graph_task
+    """
+    index, seed, path = task
+    metrics = GenerationMetrics() if _worker_state['metrics'] else NO_METRICS
+    start = metrics.start()
+    sub_graph_generator = _worker_state['graph_generator']
+    sub_graph_generator.metrics = metrics
+    graph = generate_set_graph(sub_graph_generator, _worker_state['series'], index, seed)
+    return task, graph, metrics, start
+
+
+def save_graph_task(generated_task):
+    """
+    Saving part of generate_graph_task. Only uses its argument (and read-only worker state), so it can run on a
+    writer thread while the next graph is generated (see WriteBehindQueue). Errors are raised to the caller.
+    :param generated_task: value returned by start_graph_task
+    :return: see generate_graph_task
+    """
+    (index, seed, path), graph, metrics, start = generated_task
+    output_format = _worker_state['output_format']
+    graph_hash = None
+    if _worker_state['unique']:
+        hash_start = metrics.start()
+        graph_hash = GraphHashIndex.graph_hash(graph)
+        metrics.stop('graph_hash', hash_start)
+    payload = None
+    file_paths = []
+    if output_format in GraphSetArchive.FORMATS:  # written to the set archive by the parent process
+        payload = GraphSetArchive.graph_payload(graph, output_format, os.path.basename(path))
+    else:
+        compression = None if output_format == 'xml' else output_format
+        suffix = GraphMLWriter.COMPRESSION_SUFFIXES[compression]
+        if _worker_state['save_graphml']:
+            file_paths.append(path + suffix)
+            GraphGenerator.write_graphml(graph, path + suffix, compression, metrics)
+        # write the post-processed graph directly (no need to re-parse the .graphml file)
+        file_paths.append(path + ".xml" + suffix)
+        GraphGenerator.write_post_processed_graph(graph, path + ".xml" + suffix, compression, metrics)
+    metrics.stop('total', start)
+    record = metrics.record(graph=index, file=os.path.basename(path), nodes=graph.number_of_nodes(),
+                            edges=graph.number_of_edges(), density=GraphGenerator.density(graph))
+    return (path, record, payload,
+            GraphSetManifest.file_hashes(file_paths), graph_hash)
+
+
+def generate_graph_chunk(chunk):
+    """
+    Generate a chunk of graphs of a set in a worker of a pool shared by several sets (see
+    MainGraphGenerator.run_batch). Unless the worker already is, it is initialised for the set of the chunk: the
+    common graph is generated again from the master seed (instead of being sent), so it is built exactly as in
+    the parent process and the files do not depend on how the graphs were distributed.
+    :param chunk: (set key, set parameters, list of tasks) tuple. The set parameters are the arguments of
+                  set_user_paramters (or None), the arguments of prepare_graph_set besides metrics and the
+                  arguments of init_graph_worker besides the graph generator ones.
+    :return: list of the results of generate_graph_task
+    """
+    set_key, (user_parameters, set_arguments, worker_options), tasks = chunk
+    if _worker_state.get('set_key') != set_key:
+        generator = MainGraphGenerator()
+        if user_parameters is not None:
+            generator.set_user_paramters(*user_parameters)
+        seed, no_of_graphs_in_the_set, model, model_parameters, target_no_of_edges, target_average_degree = \
+            set_arguments
+        common_graph_generator, generator_parameters, series = generator.prepare_graph_set(
+            seed, no_of_graphs_in_the_set, model=model, model_parameters=model_parameters,
+            target_no_of_edges=target_no_of_edges, target_average_degree=target_average_degree)
+        init_graph_worker(common_graph_generator.current_graph, generator_parameters, series, *worker_options)
+        _worker_state['set_key'] = set_key
+    return [generate_graph_task(task) for task in tasks]
+
+
+def regenerate_graph_task(task, attempt):
+    """
+    Generate another graph in place of a duplicate (see generate_graph_set(unique=True)), from a seed derived
+    from the seed of the graph and the attempt number, in the calling process.
+    :param task: (index, seed, path) tuple of the graph
+    :param attempt: attempt number (starting from 1)
+    :return: (new task, result of generate_graph_task) tuple
+    """
+    index, seed, path = task
+    attempt_task = (index, derive_seed(seed, attempt), path)
+    return attempt_task, generate_graph_task(attempt_task)
 
 
 class MainGraphGenerator:
@@ -14,7 +256,12 @@ class MainGraphGenerator:
     Main class for randomly generating connected graphs (with/without common graph).
     """
 
-    def __init__(self):
+    def __init__(self, rng=None):
+        """
+        :param rng: random number generator (random.Random instance) used to draw the master seed of sets
+                    generated without an explicit seed, optional (default: random module)
+        """
+        self.rng = rng if rng is not None else random
         self.user_defined_parameters = False
         self.common_graph_min_no_of_nodes = None
         self.common_graph_max_no_of_nodes = None
@@ -26,20 +273,96 @@ class MainGraphGenerator:
         self.max_no_of_total_nodes = max_no_of_total_nodes
         self.user_defined_parameters = True
 
-    def generate_graph_set(self, folder_path, no_of_graphs_in_the_set=1):
+    def generate_graph_set(self, folder_path, no_of_graphs_in_the_set=1, workers=1, seed=None, save_graphml=True,
+                           graph_indices=None, metrics=False, output_format='xml', writer_threads=0,
+                           max_pending_writes=8, resume=False, unique=False, hash_index_file=None, model=None,
+                           model_parameters=None, pool=None, target_no_of_edges=None, target_average_degree=None,
+                           stats_format='csv', summary_only=False):
         """
         :param folder_path: folder to store the generated graphs
         :param no_of_graphs_in_the_set: number of graphs to be generated as a single set
-        :return: None.
+        :param workers: number of worker processes used to generate the graphs (1 = generate in this process)
+        :param seed: master seed of the set, optional. Each graph is generated from a seed derived from it,
+                     so the same master seed gives the same files for any number of workers.
+        :param save_graphml: whether to save the intermediate networkx .graphml files next to the post-processed
+                     .graphml.xml files
+        :param graph_indices: indices (1..no_of_graphs_in_the_set) of the graphs to be generated, optional.
+                     Used with the master seed of an existing set to regenerate some of its graphs only.
+                     A ValueError is raised (before anything is written) for indices out of that range.
+        :param metrics: whether to record per-graph stage durations and counters (see GenerationMetrics). They are
+                     written to generation_metrics.jsonl in the folder (one JSON record per line, the common graph
+                     is graph 0) and summarized at the end of the run.
+        :param output_format: 'xml' (default), 'gz' or 'zst' write the files of each graph (gzip or zstd
+                     compressed with a .gz or .zst suffix, zstd requires the zstandard package). 'tar' and 'npz'
+                     write the whole set to a single graphs.tar (post-processed XML of each graph) or
+                     graphs.npz (node, edge and graph attribute tables, see GraphSetArchive) file instead, the
+                     intermediate .graphml files are not written then.
+        :param writer_threads: number of background writer threads, optional. With workers = 1 and writer
+                     threads, graphs are generated on the calling thread while the previous ones are serialized
+                     and written in the background (at most max_pending_writes graphs are pending).
+                     0 (default) writes each graph before generating the next one.
+        :param max_pending_writes: maximum number of graphs waiting to be written (see writer_threads)
+        :param resume: whether to continue an interrupted run in the folder, optional. The files of the graphs
+                     are recorded with their seeds and hashes in the manifest.jsonl checkpoint of the folder (see
+                     GraphSetManifest) as they are written; a resumed run only generates the graphs that are
+                     not recorded there (or whose files changed), with the master seed of the manifest unless
+                     one is given. The settings must be the same as in the interrupted run. The resulting files
+                     are identical to the ones of an uninterrupted run. Not available for the 'tar' and 'npz'
+                     formats.
+        :param unique: whether to reject duplicate graphs, optional. The hash of each graph (see GraphHashIndex)
+                     is checked against the graphs before it (in index order, so the set does not depend on the
+                     number of workers) and a duplicate is replaced by a graph generated from a seed derived from
+                     its own seed and an attempt number.
+        :param hash_index_file: file of a GraphHashIndex, optional (implies unique). The graphs are also checked
+                     against the graphs of the index, and the index is saved with the graphs of this set added.
+        :param model: random graph model of the common graph (see GraphModels.MODELS), optional (default:
+                     G(n,p) graphs regenerated until connected)
+        :param model_parameters: parameters of the model, e.g. {'average_degree': 6, 'rewiring': 0.2}, optional
+        :param pool: multiprocessing Pool shared with other sets (see run_batch), optional. The graphs are then
+                     generated by the pool (workers is its number of processes) instead of a pool of this set.
+        :param target_no_of_edges: number of edges of each graph, optional (default: edges are added in random
+                     rounds until the graph is connected). See GraphGenerator(no_of_edges=...); the achieved
+                     density of each graph is recorded with the metrics.
+        :param target_average_degree: average node degree of each graph, optional (instead of
+                     target_no_of_edges)
+        :param stats_format: format of the node and edge lists of the common graph, 'csv' (default) or 'npz'
+                     (see CommonGraphStatistics). They are written next to common_graph_summary.json.
+        :param summary_only: whether to only write common_graph_summary.json for the common graph, optional
+        :return: number of graphs generated (without the graphs skipped when resuming). Errors raised while
+                 generating or writing graphs are raised to the caller.
         Examples
         --------
         >>> main = MainGraphGenerator()
         >>> main.generate_graph_set("./set1", no_of_graphs_in_the_set = 1)
+        >>> main.generate_graph_set("./set2", no_of_graphs_in_the_set = 1000, workers = 8, seed = 42)
+        >>> main.generate_graph_set("./set2", no_of_graphs_in_the_set = 1000, seed = 42, graph_indices = [123])
+        >>> main.generate_graph_set("./set3", no_of_graphs_in_the_set = 100, metrics = True)
+        >>> main.generate_graph_set("./set4", no_of_graphs_in_the_set = 100000, output_format = 'npz')
+        >>> main.generate_graph_set("./set2", no_of_graphs_in_the_set = 1000, workers = 8, resume = True)
+        >>> main.generate_graph_set("./set5", no_of_graphs_in_the_set = 100, unique = True,
+        ...                         hash_index_file = "./hashes.tsv")
+        >>> main.generate_graph_set("./set6", no_of_graphs_in_the_set = 100, model = 'barabasi_albert',
+        ...                         model_parameters = {'average_degree': 6})
+        >>> main.generate_graph_set("./set7", no_of_graphs_in_the_set = 100, target_average_degree = 4)
         """
+        unique = unique or hash_index_file is not None
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError("Unknown output format: %s (use one of %s)" % (output_format, ", ".join(OUTPUT_FORMATS)))
+        if output_format == 'zst':
+            GraphMLWriter.check_compression('zst')
+        CommonGraphStatistics.check_format(stats_format)
+        if graph_indices is not None:
+            invalid = sorted(set(i for i in graph_indices if not 1 <= i <= no_of_graphs_in_the_set))
+            if invalid:
+                raise ValueError("Graph indices must be in the range of 1 to %d, got %s." % (
+                    no_of_graphs_in_the_set, ", ".join(str(i) for i in invalid)))
+        if resume and output_format in GraphSetArchive.FORMATS:
+            raise ValueError("Resuming is not available for the %s format, use one of xml, gz, zst." % output_format)
         if len(folder_path) > 0:
             folder_exists = False
             if Path(folder_path).is_dir():
-                print "Warning: folder already exists. Existing graphs will be overwritten."
+                if not resume:
+                    print "Warning: folder already exists. Existing graphs will be overwritten."
                 folder_exists = True
             else:
                 try:
@@ -51,36 +374,448 @@ class MainGraphGenerator:
             if folder_exists:
 
                 try:
-                    utils = GraphUtils()
-                    # generate a common graph first
-                    sub_graph_generator = None
-                    if self.user_defined_parameters:
-                        common_graph_generator = CommonGraphGenerator(min_no_of_nodes=self.common_graph_min_no_of_nodes,
-                                                                      max_no_of_nodes=self.common_graph_max_no_of_nodes)
-                        generated_common_graph = common_graph_generator.generate_graph()
-                        sub_graph_generator = GraphGenerator(generated_common_graph,
-                                                             max_no_of_total_nodes=self.max_no_of_total_nodes)  # initialize sub-graph generator with the common graph
-                        common_graph_generator.save_nodes_and_edges(os.path.join(folder_path, "common_graph_info.txt"))
-                    else:
-                        common_graph_generator = CommonGraphGenerator()
-                        generated_common_graph = common_graph_generator.generate_graph()
-                        sub_graph_generator = GraphGenerator(
-                                generated_common_graph)  # initialize sub-graph generator with the common graph
-                        common_graph_generator.save_nodes_and_edges(os.path.join(folder_path, "common_graph_info.txt"))
-                    # randomly generate sub-graphs
-                    for i in range(1, no_of_graphs_in_the_set + 1):
-                        suffix = 'th' if 11 <= i <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(i % 10, 'th')
-                        file_name = "%s%s_example_graph.graphml" % (i, suffix)
-                        path = os.path.join(folder_path, file_name)
-                        print "Processing:" + path
-                        generated_graph = sub_graph_generator.generate_graph()
-                        sub_graph_generator.save_graph(path)
-
-                        # post-processed saved graph
-                        utils.post_process_graphml(path)
-                        utils.save_file(path + ".xml")
+                    # the manifest of the folder is kept up to date when single graphs are regenerated
+                    manifest = GraphSetManifest(folder_path) if output_format not in GraphSetArchive.FORMATS else None
+                    manifest_found = manifest is not None and (resume or graph_indices is not None) and manifest.load()
+                    if resume and manifest_found and seed is None:
+                        seed = manifest.settings['seed']
+                    if seed is None:
+                        seed = self.rng.randint(0, 2 ** 32 - 1)
+                        print "Master seed: %d" % seed
+                    settings = self.graph_set_settings(seed, no_of_graphs_in_the_set, save_graphml, output_format)
+                    if unique:
+                        settings['unique'] = True
+                    if model is not None:
+                        settings['model'] = model
+                        settings['model_parameters'] = model_parameters or {}
+                    if target_no_of_edges is not None:
+                        settings['target_no_of_edges'] = target_no_of_edges
+                    if target_average_degree is not None:
+                        settings['target_average_degree'] = target_average_degree
+                    if stats_format != 'csv' or summary_only:
+                        settings['stats_format'] = 'summary' if summary_only else stats_format
+                    if manifest_found:
+                        manifest.check_settings(settings)
+                    common_metrics = GenerationMetrics() if metrics else NO_METRICS
+                    common_graph_generator, generator_parameters, series = self.prepare_graph_set(
+                        seed, no_of_graphs_in_the_set, common_metrics, model, model_parameters, target_no_of_edges,
+                        target_average_degree)
+                    if manifest:
+                        manifest.open(settings, append=manifest_found)
+                    save_common_graph_info = graph_indices is None
+                    # regenerating some graphs of a set (or resuming) keeps the records of the other graphs
+                    append = resume or graph_indices is not None
+                    if graph_indices is None:
+                        graph_indices = range(1, no_of_graphs_in_the_set + 1)
+                    if resume and manifest_found:
+                        save_common_graph_info = save_common_graph_info and not manifest.is_done(
+                            0, derive_seed(seed, 0))
+                        # the seed of a unique graph may be an attempt seed, its files are checked only
+                        graph_indices = [i for i in graph_indices if not manifest.is_done(
+                            i, None if unique else derive_seed(seed, i))]
+                        print "Resuming: %d graphs left to generate." % len(graph_indices)
+                    if save_common_graph_info:
+                        start = common_metrics.start()
+                        info_paths = common_graph_generator.save_statistics(folder_path, stats_format, summary_only)
+                        common_metrics.stop('save_statistics', start)
+                        if manifest:
+                            manifest.add(0, derive_seed(seed, 0), GraphSetManifest.file_hashes(info_paths))
+                    hash_index = None
+                    if unique:
+                        hash_index = GraphHashIndex()
+                        if hash_index_file and os.path.isfile(hash_index_file):
+                            hash_index.load(hash_index_file)
+                        if manifest_found:  # graphs of the set that are kept
+                            kept = set(manifest.graphs) - set(graph_indices) - set([0])
+                            for i in sorted(kept):
+                                if manifest.graphs[i].get('hash'):
+                                    hash_index.add(manifest.graphs[i]['hash'],
+                                                   os.path.abspath(os.path.join(folder_path, graph_file_name(i))))
+                    generated_common_graph = common_graph_generator.current_graph
+
+                    # randomly generate sub-graphs (each one as a variant of the common graph)
+                    tasks = [(i, derive_seed(seed, i), os.path.join(folder_path, graph_file_name(i)))
+                             for i in graph_indices]
+                    worker_arguments = (generated_common_graph, generator_parameters, series, save_graphml, metrics,
+                                        output_format, unique)
+                    metrics_file = open(os.path.join(folder_path, "generation_metrics.jsonl"),
+                                        "a" if append else "w") if metrics else None
+                    archive = GraphSetArchive(folder_path, output_format) \
+                        if output_format in GraphSetArchive.FORMATS else None
+                    records = [common_metrics.record(graph=0)]
+                    try:
+                        if metrics_file:
+                            GenerationMetrics.write_record(metrics_file, records[0])
+                        if pool is not None:
+                            if unique:
+                                init_graph_worker(*worker_arguments)
+                            set_key = (os.path.abspath(folder_path), json.dumps(settings, sort_keys=True))
+                            set_parameters = (
+                                (self.common_graph_min_no_of_nodes, self.common_graph_max_no_of_nodes,
+                                 self.max_no_of_total_nodes) if self.user_defined_parameters else None,
+                                (seed, no_of_graphs_in_the_set, model, model_parameters, target_no_of_edges,
+                                 target_average_degree), worker_arguments[3:])
+                            chunk_size = max(1, len(tasks) // (max(workers, 1) * 4))
+                            chunks = [(set_key, set_parameters, tasks[i:i + chunk_size])
+                                      for i in range(0, len(tasks), chunk_size)]
+                            self.collect_results(tasks, chain.from_iterable(pool.imap(generate_graph_chunk, chunks)),
+                                                 archive, metrics_file, records, manifest, hash_index)
+                        elif workers > 1:
+                            pool = Pool(workers, initializer=init_graph_worker, initargs=worker_arguments)
+                            if unique:  # duplicates are regenerated in this process
+                                init_graph_worker(*worker_arguments)
+                            try:
+                                chunk_size = max(1, len(tasks) // (workers * 4))
+                                self.collect_results(tasks, pool.imap(generate_graph_task, tasks, chunk_size),
+                                                     archive, metrics_file, records, manifest,
+                                                     hash_index)
+                                pool.close()
+                            except BaseException:
+                                pool.terminate()
+                                raise
+                            finally:
+                                pool.join()
+                        elif writer_threads > 0:
+                            init_graph_worker(*worker_arguments)
+                            writer = WriteBehindQueue(writer_threads, max_pending_writes)
+                            try:
+                                generated_tasks = (start_graph_task(task) for task in tasks)
+                                self.collect_results(tasks, writer.map(save_graph_task, generated_tasks), archive,
+                                                     metrics_file, records, manifest, hash_index)
+                            finally:
+                                writer.close()
+                        else:
+                            init_graph_worker(*worker_arguments)
+                            self.collect_results(tasks, (generate_graph_task(task) for task in tasks), archive,
+                                                 metrics_file, records, manifest, hash_index)
+                        if archive:
+                            archive.close()
+                        if hash_index_file:
+                            hash_index.save(hash_index_file)
+                    finally:
+                        if metrics_file:
+                            metrics_file.close()
+                        if manifest:
+                            manifest.close()
+                    if metrics:
+                        for line in GenerationMetrics.summarize(records):
+                            print line
+                    return len(tasks)
                 except IOError:
                     print ("Could not save generated graphs.")
+                    raise
+        return 0
+
+    def graph_set_settings(self, seed, no_of_graphs_in_the_set, save_graphml, output_format):
+        """
+        :return: dictionary of the settings the files of a set depend on (see GraphSetManifest)
+        """
+        return {'seed': seed, 'no_of_graphs': no_of_graphs_in_the_set, 'save_graphml': save_graphml,
+                'output_format': output_format, 'common_graph_min_no_of_nodes': self.common_graph_min_no_of_nodes,
+                'common_graph_max_no_of_nodes': self.common_graph_max_no_of_nodes,
+                'max_no_of_total_nodes': self.max_no_of_total_nodes}
+
+    def run_batch(self, batch, workers=1, report_file=None):
+        """
+        Generate many sets in this process, from a batch manifest: a list of set specs, or a dictionary with a
+        'sets' list and 'defaults' applied to every spec. A spec is a dictionary with the keys of BATCH_SET_KEYS,
+        named after the command line options, e.g.
+        {"output": "./sets/ba", "no_of_graphs": 100, "common_graph_min_no_of_nodes": 25,
+         "common_graph_max_no_of_nodes": 40, "total_no_of_nodes": 60, "seed": 1, "model": "barabasi_albert"}
+        Only "output" is required. All the sets share one pool of worker processes, and the libraries are
+        imported once. A set that fails is reported and the next sets are still generated (the pool is replaced,
+        so the remaining tasks of the failed set stop).
+        :param batch: batch manifest (see load_batch)
+        :param workers: number of worker processes shared by the sets (1 = generate in this process)
+        :param report_file: JSON file receiving the report, optional
+        :return: report: list of dictionaries (output, number of graphs generated, seconds, graphs per second,
+                 error)
+        Examples
+        --------
+        >>> main = MainGraphGenerator()
+        >>> main.run_batch({'defaults': {'no_of_graphs': 100}, 'sets': [{'output': './a', 'seed': 1},
+        ...                                                              {'output': './b', 'seed': 2}]}, workers = 8)
+        """
+        specs = MainGraphGenerator.batch_specs(batch)
+        pool = Pool(workers) if workers > 1 else None
+        report = []
+        try:
+            for spec in specs:
+                user_parameters, arguments = MainGraphGenerator.batch_set_arguments(spec)
+                set_report = {'output': spec['output'], 'graphs': 0, 'seconds': 0.0, 'graphs_per_second': 0.0,
+                              'error': None}
+                print "Set %d of %d: %s" % (len(report) + 1, len(specs), spec['output'])
+                start = time.time()
+                try:
+                    self.set_user_paramters(*user_parameters)
+                    set_report['graphs'] = self.generate_graph_set(workers=workers, pool=pool, **arguments)
+                except Exception as e:
+                    set_report['error'] = str(e)
+                    print "Set failed: %s" % e
+                    if pool is not None:  # stop the tasks of the set that are still queued or running
+                        pool.terminate()
+                        pool.join()
+                        pool = Pool(workers)
+                set_report['seconds'] = time.time() - start
+                if set_report['seconds'] > 0:
+                    set_report['graphs_per_second'] = set_report['graphs'] / set_report['seconds']
+                report.append(set_report)
+            if pool is not None:
+                pool.close()
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        print "%-40s %8s %10s %10s" % ("Set", "Graphs", "Seconds", "Graphs/s")
+        for set_report in report:
+            print "%-40s %8d %10.2f %10.1f%s" % (set_report['output'], set_report['graphs'], set_report['seconds'],
+                                                set_report['graphs_per_second'],
+                                                "  failed: " + set_report['error'] if set_report['error'] else "")
+        total_graphs = sum(set_report['graphs'] for set_report in report)
+        total_seconds = sum(set_report['seconds'] for set_report in report)
+        print "%-40s %8d %10.2f %10.1f" % ("Total", total_graphs, total_seconds,
+                                          total_graphs / total_seconds if total_seconds > 0 else 0.0)
+        if report_file:
+            with open(report_file, "w") as stream:
+                json.dump(report, stream, indent=2, sort_keys=True)
+        return report
+
+    @staticmethod
+    def load_batch(file_path):
+        """
+        :param file_path: batch manifest file, JSON or YAML (.yaml or .yml, requires the PyYAML package)
+        :return: batch manifest (see run_batch)
+        """
+        with open(file_path) as stream:
+            if file_path.endswith((".yaml", ".yml")):
+                if yaml is None:
+                    raise ImportError("Reading YAML batch manifests requires the PyYAML package (pip install pyyaml).")
+                return yaml.safe_load(stream)
+            return json.load(stream)
+
+    @staticmethod
+    def batch_specs(batch):
+        """
+        :param batch: batch manifest (see run_batch)
+        :return: list of set specs, with the defaults applied
+        :raise ValueError: for a spec without output or with unknown keys (checked before any set is generated)
+        """
+        if isinstance(batch, dict):
+            defaults, sets = batch.get('defaults', {}), batch.get('sets', [])
+        else:
+            defaults, sets = {}, batch
+        specs = []
+        for spec in sets:
+            spec = dict(defaults, **spec)
+            unknown = sorted(set(spec) - set(BATCH_SET_KEYS))
+            if unknown:
+                raise ValueError("Unknown keys in the batch set spec %s: %s" % (spec.get('output'), ", ".join(unknown)))
+            if not spec.get('output'):
+                raise ValueError("Every set of a batch needs an output folder.")
+            specs.append(spec)
+        return specs
+
+    @staticmethod
+    def batch_set_arguments(spec):
+        """
+        :param spec: set spec of a batch manifest (see run_batch)
+        :return: (arguments of set_user_paramters, keyword arguments of generate_graph_set) tuple, with the
+                 defaults of the command line. The values are converted as the command line options are (e.g. a
+                 model parameter of 4 becomes 4.0), so a set gets the same files as from the command line.
+        """
+        def optional(name, convert):
+            return convert(spec[name]) if spec.get(name) is not None else None
+
+        user_parameters = (int(spec.get('common_graph_min_no_of_nodes', 25)),
+                           int(spec.get('common_graph_max_no_of_nodes', 40)), int(spec.get('total_no_of_nodes', 40)))
+        model_parameters = dict((name, float(value)) for (name, value) in (spec.get('model_parameters') or {}).items())
+        arguments = {'folder_path': spec['output'], 'no_of_graphs_in_the_set': int(spec.get('no_of_graphs', 15)),
+                     'seed': optional('seed', int),
+                     'graph_indices': optional('only', lambda indices: [int(index) for index in indices]),
+                     'save_graphml': not spec.get('skip_graphml', False), 'metrics': spec.get('metrics', False),
+                     'output_format': spec.get('format', 'xml'), 'writer_threads': int(spec.get('writer_threads', 0)),
+                     'resume': spec.get('resume', False), 'unique': spec.get('unique', False),
+                     'hash_index_file': spec.get('hash_index'), 'model': spec.get('model'),
+                     'model_parameters': model_parameters or None,
+                     'target_no_of_edges': optional('target_edges', int),
+                     'target_average_degree': optional('target_average_degree', float),
+                     'stats_format': spec.get('stats_format', 'csv'), 'summary_only': spec.get('summary_only', False)}
+        return user_parameters, arguments
+
+    def prepare_graph_set(self, seed, no_of_graphs_in_the_set, metrics=NO_METRICS, model=None,
+                          model_parameters=None, target_no_of_edges=None, target_average_degree=None):
+        """
+        Generate the common graph and the shared serie values of a set from its master seed.
+        :param seed: master seed of the set
+        :param no_of_graphs_in_the_set: number of graphs in the set
+        :param metrics: GenerationMetrics of the common graph, optional
+        :param model: random graph model of the common graph (see GraphModels), optional
+        :param model_parameters: parameters of the model, optional
+        :param target_no_of_edges: number of edges of each graph of the set, optional
+        :param target_average_degree: average node degree of each graph of the set, optional
+        :return: (CommonGraphGenerator holding the common graph, keyword arguments for GraphGenerator,
+                  serie values) tuple
+        :raise ValueError: if some graphs of the set cannot hit the target (see GraphGenerator.check_edge_target)
+        """
+        common_rng = random.Random(derive_seed(seed, 0))
+        # generate a common graph first
+        if self.user_defined_parameters:
+            common_graph_generator = CommonGraphGenerator(min_no_of_nodes=self.common_graph_min_no_of_nodes,
+                                                          max_no_of_nodes=self.common_graph_max_no_of_nodes,
+                                                          rng=common_rng, metrics=metrics, model=model,
+                                                          model_parameters=model_parameters)
+            generator_parameters = {'max_no_of_total_nodes': self.max_no_of_total_nodes}
+        else:
+            common_graph_generator = CommonGraphGenerator(rng=common_rng, metrics=metrics, model=model,
+                                                          model_parameters=model_parameters)
+            generator_parameters = {}
+        if target_no_of_edges is not None:
+            generator_parameters['no_of_edges'] = target_no_of_edges
+        if target_average_degree is not None:
+            generator_parameters['average_degree'] = target_average_degree
+        common_graph_generator.generate_graph()
+        if target_no_of_edges is not None or target_average_degree is not None:  # before any file is written
+            GraphGenerator(common_graph_generator.current_graph, **generator_parameters).check_edge_target()
+        # pool of serie values the graphs of the set can share
+        pool = []
+        series = [GraphParameters.get_serie(0, common_rng, pool)
+                  for i in range(max(1, no_of_graphs_in_the_set // 10))]
+        return common_graph_generator, generator_parameters, series
+
+    def iter_graph_set(self, no_of_graphs_in_the_set=1, seed=None, compact=False, prefetch_size=0,
+                       graph_indices=None, model=None, model_parameters=None, target_no_of_edges=None,
+                       target_average_degree=None):
+        """
+        Generate the graphs of a set lazily in this process, instead of writing them to a folder. Only the graph
+        being consumed (and the prefetched ones) are held in memory. Unless compact is set, the graphs are the same
+        as the ones generate_graph_set writes for the same master seed and parameters.
+        :param no_of_graphs_in_the_set: number of graphs in the set
+        :param seed: master seed of the set, optional (drawn and printed if not given)
+        :param compact: if True, graphs are generated as CompactGraph objects by the vectorized generator (see
+                     GraphGenerator.generate_compact_graph; numpy arrays, node ids from 0, post-processed graph
+                     attributes). Otherwise networkx graphs post-processed in memory (see
+                     GraphUtils.post_process_graph) are returned.
+        :param prefetch_size: number of graphs generated ahead by a background thread, optional (0 = generate
+                     each graph when it is requested)
+        :param graph_indices: indices of the graphs to be generated, optional (default: all the graphs)
+        :param model: random graph model of the common graph (see generate_graph_set), optional
+        :param model_parameters: parameters of the model, optional
+        :param target_no_of_edges: number of edges of each graph (see generate_graph_set), optional
+        :param target_average_degree: average node degree of each graph (see generate_graph_set), optional
+        :return: iterator over (graph index, graph) tuples
+        Examples
+        --------
+        >>> main = MainGraphGenerator()
+        >>> for (index, graph) in main.iter_graph_set(1000, seed = 42, prefetch_size = 8):
+        ...     print index, graph.number_of_edges()
+        """
+        if seed is None:
+            seed = self.rng.randint(0, 2 ** 32 - 1)
+            print "Master seed: %d" % seed
+        common_graph_generator, generator_parameters, series = self.prepare_graph_set(
+            seed, no_of_graphs_in_the_set, model=model, model_parameters=model_parameters,
+            target_no_of_edges=target_no_of_edges, target_average_degree=target_average_degree)
+        graph_generator = GraphGenerator(common_graph_generator.current_graph, **generator_parameters)
+        if graph_indices is None:
+            graph_indices = range(1, no_of_graphs_in_the_set + 1)
+
+        def generate():
+            for index in graph_indices:
+                graph = generate_set_graph(graph_generator, series, index, derive_seed(seed, index), compact)
+                if compact:
+                    graph.graph = GraphUtils.post_process_graph_attributes(graph.graph)
+                else:
+                    graph = GraphUtils.post_process_graph(graph)
+                yield index, graph
+
+        if prefetch_size > 0:
+            return prefetch(generate(), prefetch_size)
+        return generate()
+
+    def generate_large_common_graph(self, folder_path, no_of_nodes, average_degree, seed=None, save=True,
+                                    chunk_size=CommonGraphStatistics.CHUNK_SIZE, model=None,
+                                    model_parameters=None, stats_format='csv', summary_only=False):
+        """
+        Generate a single large sparse connected common graph (e.g. millions of nodes, for stress tests) with the
+        vectorized generator (see CommonGraphGenerator.connected_compact_graph) and write it as the common graph
+        of a set is written: common_graph_summary.json and the chunked CSV (or npz) node and edge lists (see
+        CommonGraphStatistics). The wall-clock time of each stage and the peak memory of the run are reported.
+        :param folder_path: output folder
+        :param no_of_nodes: number of nodes
+        :param average_degree: target average node degree
+        :param seed: seed of the graph, optional (drawn and printed if not given)
+        :param save: whether to write the graph to the folder, optional
+        :param chunk_size: number of CSV rows written at a time, optional
+        :param model: random graph model (see GraphModels), optional (default: random tree plus uniformly
+                     chosen edges)
+        :param model_parameters: parameters of the model, optional
+        :param stats_format: format of the node and edge lists, 'csv' (default) or 'npz', optional
+        :param summary_only: whether to only write the summary (not the node and edge lists), optional
+        :return: (CompactGraph, metrics record) tuple
+        """
+        if seed is None:
+            seed = self.rng.randint(0, 2 ** 32 - 1)
+            print "Seed: %d" % seed
+        CommonGraphStatistics.check_format(stats_format)
+        metrics = GenerationMetrics()
+        common_graph_generator = CommonGraphGenerator(no_of_nodes, no_of_nodes, rng=random.Random(seed),
+                                                      metrics=metrics, average_degree=average_degree, model=model,
+                                                      model_parameters=model_parameters)
+        graph = common_graph_generator.generate_compact_graph()
+        if save:
+            if not os.path.exists(folder_path):
+                os.makedirs(folder_path)
+            start = metrics.start()
+            file_paths = common_graph_generator.save_statistics(folder_path, stats_format, summary_only, chunk_size)
+            metrics.count('bytes_written', sum(os.path.getsize(file_path) for file_path in file_paths))
+            metrics.stop('save_statistics', start)
+        record = metrics.record(nodes=graph.number_of_nodes(), edges=graph.number_of_edges(),
+                                peak_memory_mb=GenerationMetrics.peak_memory_mb())
+        print "Nodes: %d, edges: %d (average degree %.2f)" % (
+            graph.number_of_nodes(), graph.number_of_edges(), 2.0 * graph.number_of_edges() / max(no_of_nodes, 1))
+        for (stage, seconds) in sorted(record['seconds'].items()):
+            print "%s: %.3f s" % (stage, seconds)
+        print "Peak memory: %.1f MB" % record['peak_memory_mb']
+        return graph, record
+
+    @staticmethod
+    def collect_results(tasks, results, archive=None, metrics_file=None, records=None, manifest=None,
+                        hash_index=None):
+        """
+        Handle the results of generate_graph_task (in task order) as they arrive.
+        :param tasks: tasks of the set
+        :param results: iterator over the results of the tasks
+        :param archive: GraphSetArchive receiving the graphs, optional
+        :param metrics_file: JSON-lines file receiving the metrics records, optional
+        :param records: list receiving the metrics records, optional
+        :param manifest: GraphSetManifest recording the written graphs, optional
+        :param hash_index: GraphHashIndex of the graphs accepted so far (labelled with the absolute path of the
+                     graph, so indexes shared by runs from different directories agree), optional. Duplicates are
+                     regenerated (see regenerate_graph_task) until they are unique.
+        :return: None
+        """
+        for task in tasks:
+            path, record, payload, files, graph_hash = next(results)
+            if hash_index is not None:
+                attempt = 0
+                while not hash_index.add(graph_hash, os.path.abspath(path)):
+                    attempt += 1
+                    if attempt > MAX_UNIQUE_ATTEMPTS:
+                        raise ValueError("Could not generate a unique graph for %s in %d attempts, the parameters "
+                                         "allow too few different graphs." % (path, MAX_UNIQUE_ATTEMPTS))
+                    print "Duplicate of %s: %s" % (hash_index.duplicate_of(graph_hash), path)
+                    task, (path, record, payload, files, graph_hash) = regenerate_graph_task(task, attempt)
+                if record is not None and attempt:
+                    record['counters']['duplicates_rejected'] = attempt
+            print "Processing:" + path
+            if archive:
+                archive.add(task[0], payload)
+            if manifest:
+                manifest.add(task[0], task[1], files, graph_hash)
+            if metrics_file:
+                GenerationMetrics.write_record(metrics_file, record)
+                records.append(record)
 
     def main(self, argv, generator):
         # process command line arguments
@@ -89,19 +824,44 @@ class MainGraphGenerator:
         common_graph_max_no_nodes = 40
         max_no_total_nodes = 40
         output_folder = "./output"
+        workers = 1
+        save_graphml = True
+        metrics = False
+        output_format = 'xml'
+        writer_threads = 0
+        resume = False
+        unique = False
+        hash_index_file = None
+        large_no_of_nodes = None
+        average_degree = None
+        model = None
+        model_parameters = {}
+        target_no_of_edges = None
+        target_average_degree = None
+        stats_format = 'csv'
+        summary_only = False
+        batch_file = None
+        batch_report_file = None
+        seed = None
+        graph_indices = None
         error_occurred = False
         try:
-            opts, args = getopt.getopt(argv, "hn:o:m:x:t:",
+            opts, args = getopt.getopt(argv, "hn:o:m:x:t:w:s:",
                                        ["no_of_graphs=", "output=", "common_graph_min_no_of_nodes=",
-                                        "common_graph_max_no_of_nodes=", "total_no_of_nodes="])
+                                        "common_graph_max_no_of_nodes=", "total_no_of_nodes=", "workers=",
+                                        "seed=", "only=", "skip_graphml", "metrics", "format=",
+                                        "writer_threads=", "large=", "average_degree=", "resume", "unique",
+                                        "hash_index=", "model=", "model_parameters=", "target_edges=",
+                                        "target_average_degree=", "stats_format=", "summary_only", "batch=",
+                                        "batch_report="])
         except getopt.GetoptError:
-            print "generate_graphs.py -n <number of graphs> -o <output folder> -m <min no.of nodes of common graph> -x <max no. of nodes of common graph> -t <max total no. of nodes of graphs>"
+            print "generate_graphs.py -n <number of graphs> -o <output folder> -m <min no.of nodes of common graph> -x <max no. of nodes of common graph> -t <max total no. of nodes of graphs> -w <number of worker processes> -s <master seed> [--only <graph indices>] [--skip_graphml] [--metrics] [--format <xml|gz|zst|tar|npz>] [--writer_threads <number of writer threads>] [--large <no. of nodes> --average_degree <average degree>] [--resume] [--unique] [--hash_index <hash index file>] [--model <%s> [--model_parameters <name=value,...>]] [--target_edges <no. of edges> | --target_average_degree <average degree>] [--stats_format <csv|npz>] [--summary_only] [--batch <batch manifest> [--batch_report <report file>]]" % "|".join(sorted(GraphModels.MODELS))
             sys.exit(2)
 
         try:
             for opt, arg in opts:
                 if opt == '-h':
-                    print "generate_graphs.py -n <number of graphs> -o <output folder> -m <min no.of nodes of common graph> -x <max no. of nodes of common graph> -t <max total no. of nodes of graphs>"
+                    print "generate_graphs.py -n <number of graphs> -o <output folder> -m <min no.of nodes of common graph> -x <max no. of nodes of common graph> -t <max total no. of nodes of graphs> -w <number of worker processes> -s <master seed> [--only <graph indices>] [--skip_graphml] [--metrics] [--format <xml|gz|zst|tar|npz>] [--writer_threads <number of writer threads>] [--large <no. of nodes> --average_degree <average degree>] [--resume] [--unique] [--hash_index <hash index file>] [--model <%s> [--model_parameters <name=value,...>]] [--target_edges <no. of edges> | --target_average_degree <average degree>] [--stats_format <csv|npz>] [--summary_only] [--batch <batch manifest> [--batch_report <report file>]]" % "|".join(sorted(GraphModels.MODELS))
                     sys.exit()
                 elif opt in ("-o", "--output"):
                     output_folder = arg
@@ -113,25 +873,101 @@ class MainGraphGenerator:
                     common_graph_max_no_nodes = int(arg)
                 elif opt in ("-t", "--total_no_of_nodes"):
                     max_no_total_nodes = int(arg)
+                elif opt in ("-w", "--workers"):
+                    workers = int(arg)
+                elif opt in ("-s", "--seed"):
+                    seed = int(arg)
+                elif opt == "--only":
+                    graph_indices = [int(index) for index in arg.split(",")]
+                elif opt == "--skip_graphml":
+                    save_graphml = False
+                elif opt == "--metrics":
+                    metrics = True
+                elif opt == "--format":
+                    output_format = arg
+                elif opt == "--writer_threads":
+                    writer_threads = int(arg)
+                elif opt == "--resume":
+                    resume = True
+                elif opt == "--unique":
+                    unique = True
+                elif opt == "--hash_index":
+                    hash_index_file = arg
+                elif opt == "--large":
+                    large_no_of_nodes = int(arg)
+                elif opt == "--average_degree":
+                    average_degree = float(arg)
+                elif opt == "--model":
+                    model = arg
+                elif opt == "--target_edges":
+                    target_no_of_edges = int(arg)
+                elif opt == "--target_average_degree":
+                    target_average_degree = float(arg)
+                elif opt == "--stats_format":
+                    stats_format = arg
+                elif opt == "--summary_only":
+                    summary_only = True
+                elif opt == "--batch":
+                    batch_file = arg
+                elif opt == "--batch_report":
+                    batch_report_file = arg
+                elif opt == "--model_parameters":
+                    for parameter in arg.split(","):
+                        name, value = parameter.split("=")
+                        model_parameters[name] = float(value)
         except Exception as e:
             error_occurred = True
             print "Seems like there is a problem with the command-line parameters. Please confrom to the following specification:"
-            print "generate_graphs.py -n <number of graphs> -o <output folder> -m <min no.of nodes of common graph> -x <max no. of nodes of common graph> -t <max total no. of nodes of graphs>"
-            print "e.g. generate_graphs.py -n 15 -o ./output -min 25 -max 40 -total 40"
+            print "generate_graphs.py -n <number of graphs> -o <output folder> -m <min no.of nodes of common graph> -x <max no. of nodes of common graph> -t <max total no. of nodes of graphs> -w <number of worker processes> -s <master seed> [--only <graph indices>] [--skip_graphml] [--metrics] [--format <xml|gz|zst|tar|npz>] [--writer_threads <number of writer threads>] [--large <no. of nodes> --average_degree <average degree>] [--resume] [--unique] [--hash_index <hash index file>] [--model <%s> [--model_parameters <name=value,...>]] [--target_edges <no. of edges> | --target_average_degree <average degree>] [--stats_format <csv|npz>] [--summary_only] [--batch <batch manifest> [--batch_report <report file>]]" % "|".join(sorted(GraphModels.MODELS))
+            print "e.g. generate_graphs.py -n 15 -o ./output -min 25 -max 40 -total 40 -w 4"
 
         if len(opts) == 0:
             print "Warning: Graphs will be generated using the default settings."
-        if not error_occurred:
+        if average_degree is not None and model is not None:
+            model_parameters['average_degree'] = average_degree
+        if not error_occurred and batch_file is not None:
+            print "Batch manifest: %s\nWorker processes: %d\n" % (batch_file, workers)
+            try:
+                report = generator.run_batch(generator.load_batch(batch_file), workers, batch_report_file)
+            except Exception as e:
+                print "An error occurred: %s" % e
+                sys.exit(1)
+            if any(set_report['error'] for set_report in report):
+                sys.exit(1)
+            print "done."
+        elif not error_occurred and large_no_of_nodes is not None:
+            average_degree = average_degree if average_degree is not None else 8.0
+            print "Large common graph: %d nodes, average degree %s\nOutput folder: %s\n" % (
+                large_no_of_nodes, average_degree, output_folder)
+            try:
+                generator.generate_large_common_graph(output_folder, large_no_of_nodes, average_degree, seed=seed,
+                                                      model=model, model_parameters=model_parameters,
+                                                      stats_format=stats_format, summary_only=summary_only)
+            except Exception as e:
+                print "An error occurred: %s" % e
+                sys.exit(1)
+            print "done."
+        elif not error_occurred:
             print "No. of graphs: %d\nMinimum no. of nodes of common graph: %d\nMaximum no. of nodes of common graph: %d\n" \
-                  "Maxiumum total number of nodes of graph: %d\nOutput folder: %s\n" % (
+                  "Maxiumum total number of nodes of graph: %d\nOutput folder: %s\nWorker processes: %d\n" % (
                       number_of_graphs, common_graph_min_no_nodes, common_graph_max_no_nodes, max_no_total_nodes,
-                      output_folder)
+                      output_folder, workers)
 
             try:
                 generator.set_user_paramters(common_graph_min_no_nodes, common_graph_max_no_nodes, max_no_total_nodes)
-                generator.generate_graph_set(output_folder, number_of_graphs)
+                generator.generate_graph_set(output_folder, number_of_graphs, workers=workers, seed=seed,
+                                             save_graphml=save_graphml, graph_indices=graph_indices,
+                                             metrics=metrics, output_format=output_format,
+                                             writer_threads=writer_threads, resume=resume, unique=unique,
+                                             hash_index_file=hash_index_file, model=model,
+                                             model_parameters=model_parameters or None,
+                                             target_no_of_edges=target_no_of_edges,
+                                             target_average_degree=target_average_degree,
+                                             stats_format=stats_format, summary_only=summary_only)
             except Exception as e:
-                print "An error occurred. Please try again with different parameters and ensure the output folder has write permission."
+                print "An error occurred: %s" % e
+                print "Please try again with different parameters and ensure the output folder has write permission."
+                sys.exit(1)
             print "done."
 
 
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import generate_graphs
+from generate_graphs import MainGraphGenerator
+from GraphSetManifest import GraphSetManifest
+
+
+def folder_hashes(folder_path):
+    """
+    :return: dictionary of file name -> SHA-256 of the files of a folder
+    """
+    return GraphSetManifest.file_hashes(os.path.join(folder_path, name) for name in os.listdir(folder_path))
+
+
+class GraphSetTestCase(unittest.TestCase):
+    """
+    Base class: a temporary folder per test and a small set generator.
+    """
+
+    NO_OF_GRAPHS = 12
+    SEED = 7
+
+    def setUp(self):
+        self.folder_path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder_path)
+
+    def set_path(self, name):
+        return os.path.join(self.folder_path, name)
+
+    def generate(self, name, **arguments):
+        generator = MainGraphGenerator()
+        generator.set_user_paramters(25, 40, 60)
+        arguments.setdefault('seed', GraphSetTestCase.SEED)
+        generator.generate_graph_set(self.set_path(name), GraphSetTestCase.NO_OF_GRAPHS, **arguments)
+        return folder_hashes(self.set_path(name))
+
+
+class TestDeterminism(GraphSetTestCase):
+    """
+    The same master seed gives byte-identical files however the graphs are generated.
+    """
+
+    def test_workers(self):
+        self.assertEqual(self.generate("serial"), self.generate("parallel", workers=3))
+
+    def test_writer_threads(self):
+        self.assertEqual(self.generate("serial"), self.generate("threads", writer_threads=2))
+
+    def test_compressed_formats(self):
+        for output_format in ('gz', 'tar', 'npz'):
+            self.assertEqual(self.generate(output_format + "1", output_format=output_format),
+                             self.generate(output_format + "2", output_format=output_format, workers=2))
+
+    def test_batch(self):
+        expected = self.generate("single")
+        MainGraphGenerator().run_batch({'defaults': {'no_of_graphs': GraphSetTestCase.NO_OF_GRAPHS,
+                                                     'total_no_of_nodes': 60, 'seed': GraphSetTestCase.SEED},
+                                        'sets': [{'output': self.set_path("batch1")},
+                                                 {'output': self.set_path("batch2"), 'seed': 8}]}, workers=2)
+        self.assertEqual(expected, folder_hashes(self.set_path("batch1")))
+        self.assertEqual(self.generate("single8", seed=8), folder_hashes(self.set_path("batch2")))
+
+    def test_single_graphs(self):
+        expected = self.generate("all")
+        regenerated = self.generate("some", graph_indices=[5, 11])
+        for (name, digest) in regenerated.items():
+            if name != GraphSetManifest.FILE_NAME:
+                self.assertEqual(expected[name], digest, name)
+
+
+class TestResume(GraphSetTestCase):
+    """
+    A set interrupted and resumed with the same seed ends with the files and manifest of an uninterrupted run.
+    """
+
+    INTERRUPTED_INDEX = 6
+
+    def generate_interrupted(self, name):
+        start_graph_task = generate_graphs.start_graph_task
+
+        def interrupt(task):
+            if task[0] == TestResume.INTERRUPTED_INDEX:
+                raise KeyboardInterrupt()
+            return start_graph_task(task)
+
+        generate_graphs.start_graph_task = interrupt
+        try:
+            self.assertRaises(KeyboardInterrupt, self.generate, name)
+        finally:
+            generate_graphs.start_graph_task = start_graph_task
+        manifest = GraphSetManifest(self.set_path(name))
+        self.assertTrue(manifest.load())
+        self.assertTrue(manifest.is_done(TestResume.INTERRUPTED_INDEX - 1))
+        self.assertFalse(manifest.is_done(TestResume.INTERRUPTED_INDEX))
+
+    def test_resume(self):
+        expected = self.generate("uninterrupted")
+        self.generate_interrupted("resumed")
+        self.assertEqual(expected, self.generate("resumed", resume=True))
+
+    def test_resume_in_parallel(self):
+        expected = self.generate("uninterrupted")
+        self.generate_interrupted("resumed")
+        resumed = self.generate("resumed", resume=True, workers=3)
+        for name in set(expected) | set(resumed):
+            if name != GraphSetManifest.FILE_NAME:  # graphs are recorded in the order they are done
+                self.assertEqual(expected.get(name), resumed.get(name), name)
+        manifests = [GraphSetManifest(self.set_path(name)) for name in ("uninterrupted", "resumed")]
+        for manifest in manifests:
+            manifest.load()
+        self.assertEqual(manifests[0].settings, manifests[1].settings)
+        self.assertEqual(manifests[0].graphs, manifests[1].graphs)
+
+
+if __name__ == '__main__':
+    unittest.main()
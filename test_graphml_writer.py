@@ -0,0 +1,78 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+from CommonGraphGenerator import CommonGraphGenerator
+from GraphGenerator import GraphGenerator
+from GraphMLWriter import GraphMLWriter
+from GraphUtils import GraphUtils
+
+
+def local_name(element):
+    return element.tag.split('}')[-1]
+
+
+def parse_document(file_path):
+    """
+    :return: content of a post-processed document, independent of the order of its elements: keys, graph id
+             and data, data of each node id, edge ids and (source, target, data) of the edges
+    """
+    root = ET.parse(file_path).getroot()
+
+    def data(element):
+        return dict((child.get('key'), child.text) for child in element if local_name(child) == 'data')
+
+    keys = set((key.get('id'), key.get('for'), key.get('attr.name'), key.get('attr.type'))
+               for key in root if local_name(key) == 'key')
+    graph = [element for element in root if local_name(element) == 'graph'][0]
+    nodes = dict((node.get('id'), data(node)) for node in graph if local_name(node) == 'node')
+    edges = [edge for edge in graph if local_name(edge) == 'edge']
+    return {'keys': keys, 'graph_id': graph.get('id'), 'graph_data': data(graph), 'nodes': nodes,
+            'edge_ids': sorted(edge.get('id') for edge in edges),
+            'edges': sorted((edge.get('source'), edge.get('target'), sorted(data(edge).items())) for edge in edges)}
+
+
+class TestGraphMLWriter(unittest.TestCase):
+    """
+    The single-pass writer gives a document equivalent to nx.write_graphml + GraphUtils post-processing.
+    """
+
+    def setUp(self):
+        self.folder_path = tempfile.mkdtemp()
+        common_graph = CommonGraphGenerator(25, 40, rng=random.Random(1)).generate_graph()
+        self.graph = GraphGenerator(common_graph, max_no_of_total_nodes=60,
+                                    rng=random.Random(2)).generate_graph(design_index=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder_path)
+
+    def post_processed_document(self):
+        graphml_path = os.path.join(self.folder_path, "1st_example_graph.graphml")
+        GraphGenerator.write_graphml(self.graph, graphml_path)
+        utils = GraphUtils()
+        utils.post_process_graphml(graphml_path)
+        utils.save_file(graphml_path + ".xml")
+        return parse_document(graphml_path + ".xml")
+
+    def test_equivalent_to_post_processing(self):
+        expected = self.post_processed_document()
+        written_path = os.path.join(self.folder_path, "written.xml")
+        GraphGenerator.write_post_processed_graph(self.graph, written_path)
+        written = parse_document(written_path)
+        for part in ('keys', 'graph_id', 'graph_data', 'nodes', 'edge_ids', 'edges'):
+            self.assertEqual(expected[part], written[part], part)
+        self.assertEqual(len(written['edges']), self.graph.number_of_edges())
+
+    def test_to_string(self):
+        expected = self.post_processed_document()
+        written_path = os.path.join(self.folder_path, "string.xml")
+        with open(written_path, "wb") as stream:
+            stream.write(GraphMLWriter.to_string(self.graph))
+        self.assertEqual(expected, parse_document(written_path))
+
+
+if __name__ == '__main__':
+    unittest.main()